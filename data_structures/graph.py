@@ -1,11 +1,25 @@
+import os
+from array import array
 from collections import defaultdict
+from multiprocessing import Pool
 
-from data_structures.union_find import UnionFind
+from data_structures.union_find import CompactUnionFind, UnionFind
 
 
 class Graph:
+    """
+    Adjacency list graph that keeps a union-find index of its (weakly) connected components
+    up to date as vertices and edges are added, so `connected` and `component_size` are O(α(n)).
+    The index only tracks changes made through `add_vertex` and `add_edge`.
+    Once any edge is given a weight, `weights[v]` holds the weights of the edges of `adjacency_list[v]`
+    (1 unless given). Until then `weights` stays empty, so unweighted graphs don't pay for it.
+    """
+
     def __init__(self, adjacency_list=None):
         self.adjacency_list = defaultdict(list)
+        self.weights = defaultdict(list)
+        self._weighted = False
+        self._components = UnionFind()
 
         if not adjacency_list:
             return
@@ -18,36 +32,445 @@ class Graph:
     def add_vertex(self, v):
         if v not in self.adjacency_list:
             self.adjacency_list[v] = []
+            self._components.add(v)
 
-    def add_edge(self, v1, v2):
+    def add_edge(self, v1, v2, weight=None):
+        self.add_vertex(v1)
         self.adjacency_list[v1].append(v2)
+        if weight is not None and not self._weighted:
+            self._weighted = True
+            # backfill the default weight of the edges added so far (this one included)
+            for v, edges in self.adjacency_list.items():
+                self.weights[v] = [1] * len(edges)
+            self.weights[v1][-1] = weight
+        elif self._weighted:
+            self.weights[v1].append(1 if weight is None else weight)
         self.add_vertex(v2)
+        self._components.union(v1, v2)
 
     def is_undirected(self):
-        for v1, edges in self.adjacency_list.items():
-            for v2 in edges:
-                if v1 not in self.adjacency_list[v2]:
-                    return False
-        return True
+        edges = {(v1, v2) for v1, v2s in self.adjacency_list.items() for v2 in v2s}
+        return all((v2, v1) in edges for v1, v2 in edges)
 
     def get_components(self):
+        """
+        Read off the incrementally maintained index, without re-traversing the graph
+        (beyond the O(V + E) check that it is un-directed, which keeps no per-edge state between calls)
+        """
         assert self.is_undirected(), "Computing components requires an un-directed graph"
 
-        vertices = self.adjacency_list.keys()
+        return self._components.sets()
+
+    def connected(self, v1, v2):
+        return self._components.connected(v1, v2)
+
+    def component_size(self, v):
+        return self._components.component_size(v)
+
+    def strongly_connected_components(self):
+        """
+        Strongly connected components, in a topological order of the condensation
+        """
+        return CSRGraph.from_graph(self).strongly_connected_components()
+
+    def condensation(self):
+        """
+        Returns the DAG of strongly connected components (over their indices) and the list of components
+        """
+        csr = CSRGraph.from_graph(self)
+        dag, labels = csr.condensation()
+        comps = [set() for _ in range(len(dag))]
+        for v, c in zip(csr.vertices, labels):
+            comps[c].add(v)
+
+        return Graph(adjacency_list={c: list(dag.neighbor_ids(c)) for c in range(len(dag))}), comps
+
+    def topological_sort(self):
+        """
+        Raises a ValueError if the graph has a cycle
+        """
+        return CSRGraph.from_graph(self).topological_sort()
+
+    def topological_levels(self):
+        """
+        Vertices grouped by the length of the longest path reaching them,
+        so every level only depends on the previous ones. Raises a ValueError if the graph has a cycle.
+        """
+        return CSRGraph.from_graph(self).topological_levels()
+
+    def minimum_spanning_forest(self, algorithm="kruskal", processes=1):
+        """
+        The (v1, v2, weight) edges of a minimum spanning forest, treating edges as un-directed.
+        See `CSRGraph.minimum_spanning_forest_ids` for the algorithms.
+        """
+        csr = CSRGraph.from_graph(self)
+        sources, offsets = csr.source_ids(), csr.offsets
+        vertices, targets = csr.vertices, csr.targets
+
+        def edge(k):
+            # the weight as given to `add_edge` (the CSR keeps them as floats), at the same
+            # position in `weights[v1]` as the edge's in the CSR row of v1
+            v1 = vertices[sources[k]]
+            weight = self.weights[v1][k - offsets[sources[k]]] if self._weighted else 1
+            return v1, vertices[targets[k]], weight
+
+        return list(map(edge, csr.minimum_spanning_forest_ids(algorithm=algorithm, processes=processes)))
+
+
+class CSRGraph:
+    """
+    Frozen compressed sparse row representation of a Graph
+
+    Vertices are relabelled with the dense ids 0..n-1 of their position in `vertices`,
+    and the targets of vertex i's edges are `targets[offsets[i]:offsets[i + 1]]`.
+    Both are int buffers (`array`s) so an edge costs 4 bytes instead of a Python object
+    in a list, and traversals run over the raw ids.
+    Optional edge `weights` are kept parallel to `targets`.
+    When those are views into some `buffer` (e.g. a memory mapped snapshot), the graph keeps it alive.
+    """
+
+    def __init__(self, vertices, offsets, targets, weights=None, buffer=None):
+        self.vertices = vertices
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self._ids = None
+        self._buffer = buffer
+
+    @classmethod
+    def from_graph(cls, graph):
+        vertices = list(graph.adjacency_list.keys())
+        ids = {v: i for i, v in enumerate(vertices)}
+
+        offsets, targets = array("q", [0]), array("i")
+        for edges in graph.adjacency_list.values():
+            targets.extend(map(ids.__getitem__, edges))
+            offsets.append(len(targets))
+
+        weights = None
+        if graph._weighted:
+            weights = array("d")
+            for v in vertices:
+                weights.extend(graph.weights[v])
+
+        csr = cls(vertices, offsets, targets, weights=weights)
+        csr._ids = ids
+        return csr
+
+    @classmethod
+    def from_edges(cls, sources, targets, n=None, vertices=None, weights=None):
+        """
+        Builds the graph with an edge sources[k] -> targets[k] (of weight weights[k]) for every k,
+        out of parallel sequences of int ids in 0..n-1 (e.g. arrays), with a counting sort on the sources.
+        `n` defaults to the number of `vertices`, which default to the ids themselves.
+        """
+        if n is None:
+            if vertices is not None:
+                n = len(vertices)
+            else:
+                n = 1 + max(max(sources, default=-1), max(targets, default=-1))
+        if vertices is None:
+            vertices = range(n)
+
+        offsets = array("q", [0]) * (n + 1)
+        for v in sources:
+            offsets[v + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        slots = offsets[:-1]
+        csr_targets = array("i", [0]) * len(targets)
+        for v, w in zip(sources, targets):
+            csr_targets[slots[v]] = w
+            slots[v] += 1
+
+        csr_weights = None
+        if weights is not None:
+            slots = offsets[:-1]
+            csr_weights = array("d", [0.0]) * len(targets)
+            for v, weight in zip(sources, weights):
+                csr_weights[slots[v]] = weight
+                slots[v] += 1
+
+        return cls(vertices, offsets, csr_targets, weights=csr_weights)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def num_edges(self):
+        return len(self.targets)
+
+    def id_of(self, v):
+        if isinstance(self.vertices, range):
+            try:
+                return self.vertices.index(v)
+            except ValueError:
+                raise KeyError(v)
+        if self._ids is None:
+            self._ids = {u: i for i, u in enumerate(self.vertices)}
+        return self._ids[v]
+
+    def neighbor_ids(self, i):
+        return memoryview(self.targets)[self.offsets[i]:self.offsets[i + 1]]
+
+    def neighbors(self, v):
+        vertices = self.vertices
+        for j in self.neighbor_ids(self.id_of(v)):
+            yield vertices[j]
+
+    def degree(self, v):
+        i = self.id_of(v)
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def source_ids(self):
+        """
+        The source id of every edge, parallel to `targets`
+        """
+        offsets = self.offsets
+        sources = array("i")
+        for i in range(len(self)):
+            sources.extend(array("i", [i]) * (offsets[i + 1] - offsets[i]))
+        return sources
+
+    def get_components(self):
+        """
+        Components of the graph (weakly connected ones if it is directed) via a single union-find pass
+        """
+        comps = CompactUnionFind(len(self))
+        comps.union_many(self.source_ids(), self.targets)
+
+        vertices = self.vertices
+        return [{vertices[i] for i in comp} for comp in comps.sets()]
+
+    def scc_labels(self):
+        """
+        Iterative Tarjan: returns the number of strongly connected components and an `array('i')`
+        of every vertex's component, where components are numbered in a topological order.
+        The DFS call stack lives in two arrays, so there is no recursion whatever the depth.
+        """
+        n = len(self)
+        offsets, targets = self.offsets, self.targets
+        index = array("i", [-1]) * n
+        low = array("i", [0]) * n
+        on_stack = bytearray(n)
+        labels = array("i", [-1]) * n
+        stack, call_vertices, call_edges = array("i"), array("i"), array("q")
+        counter = comp_count = 0
+
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            call_vertices.append(root)
+            call_edges.append(offsets[root])
+
+            while call_vertices:
+                v, k = call_vertices[-1], call_edges[-1]
+                if k < offsets[v + 1]:
+                    call_edges[-1] = k + 1
+                    w = targets[k]
+                    if index[w] < 0:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = 1
+                        call_vertices.append(w)
+                        call_edges.append(offsets[w])
+                    elif on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                    continue
+
+                call_vertices.pop()
+                call_edges.pop()
+                if call_vertices and low[v] < low[call_vertices[-1]]:
+                    low[call_vertices[-1]] = low[v]
+
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        labels[w] = comp_count
+                        if w == v:
+                            break
+                    comp_count += 1
+
+        # Tarjan completes the components in reverse topological order
+        last = comp_count - 1
+        for v in range(n):
+            labels[v] = last - labels[v]
+        return comp_count, labels
+
+    def strongly_connected_components(self):
+        comp_count, labels = self.scc_labels()
+        comps = [set() for _ in range(comp_count)]
+        for v, c in zip(self.vertices, labels):
+            comps[c].add(v)
+        return comps
+
+    def condensation(self):
+        """
+        Returns the DAG of the strongly connected components, over their `scc_labels` ids,
+        without duplicate edges, together with those labels
+        """
+        comp_count, labels = self.scc_labels()
+        edges = set()
+        for v, w in zip(self.source_ids(), self.targets):
+            if labels[v] != labels[w]:
+                edges.add(labels[v] * comp_count + labels[w])
+
+        edges = sorted(edges)
+        dag = CSRGraph.from_edges(
+            array("i", (e // comp_count for e in edges)),
+            array("i", (e % comp_count for e in edges)),
+            n=comp_count,
+        )
+        return dag, labels
+
+    def topological_level_ids(self):
+        """
+        Kahn's algorithm, one level at a time: a list of `array('i')`s of vertex ids
+        """
+        n = len(self)
+        offsets, targets = self.offsets, self.targets
+        in_degree = array("i", [0]) * n
+        for w in targets:
+            in_degree[w] += 1
+
+        levels = []
+        level = array("i", (v for v in range(n) if not in_degree[v]))
+        ordered = 0
+        while level:
+            levels.append(level)
+            ordered += len(level)
+            next_level = array("i")
+            for u in level:
+                for k in range(offsets[u], offsets[u + 1]):
+                    w = targets[k]
+                    in_degree[w] -= 1
+                    if not in_degree[w]:
+                        next_level.append(w)
+            level = next_level
+
+        if ordered < n:
+            raise ValueError("a graph with a cycle has no topological order")
+        return levels
+
+    def topological_levels(self):
+        vertices = self.vertices
+        return [[vertices[v] for v in level] for level in self.topological_level_ids()]
+
+    def topological_sort(self):
+        vertices = self.vertices
+        return [vertices[v] for level in self.topological_level_ids() for v in level]
+
+    def minimum_spanning_forest_ids(self, algorithm="kruskal", processes=1):
+        """
+        Indices (into `targets`) of the edges of a minimum spanning forest, treating edges as un-directed.
+        Edges weigh 1 if the graph has no weights, and ties are broken by edge index.
+
+        * kruskal: a single (C level) argsort of the weights, then CompactUnionFind unions in that order
+        * boruvka: rounds in which every component picks its cheapest outgoing edge, a search which is
+          spread over `processes` worker processes (None meaning one per core) when it is not 1
+        """
+        if algorithm == "kruskal":
+            return self._kruskal()
+        if algorithm == "boruvka":
+            return self._boruvka(processes)
+        raise ValueError(f"unknown minimum spanning forest algorithm {algorithm!r}")
+
+    def _edge_weights(self):
+        if self.weights is not None:
+            return self.weights
+        return array("d", [1.0]) * self.num_edges()
+
+    def _kruskal(self):
+        sources, targets, weights = self.source_ids(), self.targets, self._edge_weights()
+        forest_size = len(self) - 1
+
+        comps = CompactUnionFind(len(self))
+        res = array("i")
+        for k in sorted(range(len(targets)), key=weights.__getitem__):
+            if len(res) == forest_size:
+                break
+            if comps.union(sources[k], targets[k]) is not None:
+                res.append(k)
+        return res
+
+    def _boruvka(self, processes):
+        sources, targets, weights = self.source_ids(), self.targets, self._edge_weights()
+        m = len(targets)
+
+        pool = None
+        if processes != 1:
+            processes = processes or os.cpu_count()
+            pool = Pool(processes, initializer=_share_edges, initargs=(sources, targets, weights))
+
+        comps = CompactUnionFind(len(self))
+        res = array("i")
+        try:
+            while True:
+                labels = comps.find_many(range(len(self)))
+                if pool is None:
+                    cheapest = _cheapest_edges(sources, targets, weights, labels, 0, m)
+                else:
+                    step = max(1, -(-m // processes))
+                    tasks = [(labels, lo, min(lo + step, m)) for lo in range(0, m, step)]
+                    cheapest = {}
+                    for partial in pool.map(_pool_cheapest_edges, tasks):
+                        _merge_cheapest(cheapest, partial, weights)
+
+                merged = False
+                for k in cheapest.values():
+                    if comps.union(sources[k], targets[k]) is not None:
+                        res.append(k)
+                        merged = True
+                if not merged:
+                    return res
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+
+def _merge_cheapest(cheapest, partial, weights):
+    for c, k in partial.items():
+        best = cheapest.get(c)
+        if best is None or (weights[k], k) < (weights[best], best):
+            cheapest[c] = k
+
+
+def _cheapest_edges(sources, targets, weights, labels, lo, hi):
+    """
+    Borůvka step over the edges lo..hi-1: the cheapest edge (by weight, then index)
+    leaving each component, keyed by the component's label
+    """
+    cheapest = {}
+    for k in range(lo, hi):
+        a, b = labels[sources[k]], labels[targets[k]]
+        if a == b:
+            continue
+        key = (weights[k], k)
+        for c in (a, b):
+            best = cheapest.get(c)
+            if best is None or key < (weights[best], best):
+                cheapest[c] = k
+    return cheapest
+
 
-        comps = UnionFind(vertices)
-        visited = set()
+_edges = None
 
-        def visit(v1):
-            if v1 in visited:
-                return
-            visited.add(v1)
 
-            for v2 in self.adjacency_list[v1]:
-                comps.union(v1, v2)
-                visit(v2)
+def _share_edges(sources, targets, weights):
+    """
+    Pool initializer: the edge arrays are sent to every worker once, not once per round
+    """
+    global _edges
+    _edges = (sources, targets, weights)
 
-        for v in vertices:
-            visit(v)
 
-        return comps.sets()
+def _pool_cheapest_edges(task):
+    labels, lo, hi = task
+    return _cheapest_edges(*_edges, labels, lo, hi)
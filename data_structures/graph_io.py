@@ -0,0 +1,168 @@
+import mmap
+import struct
+import sys
+from array import array
+from itertools import chain, count, filterfalse, islice
+
+from data_structures.graph import CSRGraph
+
+MAGIC = b"PYALGCSR"
+VERSION = 1
+
+# magic, version, flags, vertex count, edge count
+_HEADER = struct.Struct("=8sIIQQ")
+
+_RANGE_VERTICES, _INT_VERTICES, _STR_VERTICES = 0, 1, 2
+_VERTEX_KIND_MASK = 0b11
+_WEIGHTED = 0b100
+_BIG_ENDIAN = 0b1000
+
+
+def read_edge_list(file, delimiter=None, vertex=int, weighted=False, comment="#", chunk_size=1 << 16):
+    """
+    Streams a text/CSV edge list ("source target [weight]" per line) into a CSRGraph.
+    `file` is a path or an open text file, lines are read `chunk_size` at a time,
+    and each chunk is split into fields by a single `split` of the joined lines,
+    whose columns are parsed and relabelled by `map`s straight into id arrays:
+    the only dict is the vertex -> id table.
+    `vertex` parses a vertex label (e.g. `str` to keep them as is).
+    """
+    if isinstance(file, str):
+        with open(file) as f:
+            return read_edge_list(f, delimiter, vertex, weighted, comment, chunk_size)
+
+    ids = {}
+    sources, targets = array("i"), array("i")
+    weights = array("d") if weighted else None
+
+    k = 3 if weighted else 2
+    for chunk in iter(lambda: list(islice(file, chunk_size)), []):
+        lines = [line for line in map(str.strip, chunk) if line and not line.startswith(comment)]
+        fields = (" " if delimiter is None else delimiter).join(lines).split(delimiter)
+        if len(fields) != k * len(lines):
+            # some line has extra (ignored) or missing fields: split it line by line
+            fields = []
+            for line in lines:
+                line_fields = line.split(delimiter)
+                if len(line_fields) < k:
+                    raise ValueError(f"expected {k} fields in {line!r}")
+                fields.extend(line_fields[:k])
+
+        vs = list(map(vertex, map(str.strip, fields[0::k])))
+        ws = list(map(vertex, map(str.strip, fields[1::k])))
+        # new labels get the next ids in order of first appearance
+        new = filterfalse(ids.__contains__, dict.fromkeys(chain.from_iterable(zip(vs, ws))))
+        ids.update(zip(new, count(len(ids))))
+        sources.extend(map(ids.__getitem__, vs))
+        targets.extend(map(ids.__getitem__, ws))
+        if weighted:
+            weights.extend(map(float, fields[2::k]))
+
+    return CSRGraph.from_edges(sources, targets, vertices=list(ids), weights=weights)
+
+
+class _StrTable:
+    """
+    Read-only sequence of the str labels stored back to back in a snapshot
+    """
+
+    def __init__(self, offsets, blob):
+        self._offsets, self._blob = offsets, blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        i %= len(self)
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self)))
+
+
+def _padded(nbytes):
+    return nbytes + -nbytes % 8
+
+
+def save_snapshot(graph: CSRGraph, path):
+    """
+    Writes `graph` as a binary snapshot that `load_snapshot` maps back into memory:
+    a header, then the offsets (int64), targets (int32), optional weights (float64)
+    and the vertex table, each section 8-byte aligned.
+    Vertices must be the ids themselves (a range), ints or strs.
+    """
+    n, m = len(graph), graph.num_edges()
+    flags = _BIG_ENDIAN if sys.byteorder == "big" else 0
+    if graph.weights is not None:
+        flags |= _WEIGHTED
+
+    vertices = graph.vertices
+    if isinstance(vertices, range) and vertices == range(n):
+        flags |= _RANGE_VERTICES
+        labels = []
+    elif all(type(v) is int for v in vertices):
+        flags |= _INT_VERTICES
+        labels = [array("q", vertices)]
+    elif all(type(v) is str for v in vertices):
+        flags |= _STR_VERTICES
+        encoded = [v.encode("utf-8") for v in vertices]
+        label_offsets = array("q", [0])
+        for label in encoded:
+            label_offsets.append(label_offsets[-1] + len(label))
+        labels = [label_offsets, b"".join(encoded)]
+    else:
+        raise TypeError("snapshot vertices must be all ints or all strs")
+
+    sections = [array("q", graph.offsets), array("i", graph.targets)]
+    if graph.weights is not None:
+        sections.append(array("d", graph.weights))
+    sections.extend(labels)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, flags, n, m))
+        for section in sections:
+            data = memoryview(section).cast("B")
+            f.write(data)
+            f.write(bytes(_padded(len(data)) - len(data)))
+
+
+def load_snapshot(path) -> CSRGraph:
+    """
+    Memory maps a `save_snapshot` file: the CSR arrays are views into the (shared, read-only)
+    page cache, so opening it costs O(1) whatever the size of the graph
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, flags, n, m = _HEADER.unpack_from(mm)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} graph snapshot")
+    if bool(flags & _BIG_ENDIAN) != (sys.byteorder == "big"):
+        raise ValueError(f"{path} was written with a different byte order")
+
+    view = memoryview(mm)
+    pos = _HEADER.size
+
+    def section(count, fmt):
+        nonlocal pos
+        nbytes = count * struct.calcsize(fmt)
+        res = view[pos:pos + nbytes].cast(fmt)
+        pos += _padded(nbytes)
+        return res
+
+    offsets = section(n + 1, "q")
+    targets = section(m, "i")
+    weights = section(m, "d") if flags & _WEIGHTED else None
+
+    kind = flags & _VERTEX_KIND_MASK
+    if kind == _RANGE_VERTICES:
+        vertices = range(n)
+    elif kind == _INT_VERTICES:
+        vertices = section(n, "q")
+    else:
+        label_offsets = section(n + 1, "q")
+        vertices = _StrTable(label_offsets, section(label_offsets[n], "B"))
+
+    return CSRGraph(vertices, offsets, targets, weights=weights, buffer=mm)
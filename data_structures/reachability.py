@@ -0,0 +1,96 @@
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+from data_structures.graph import CSRGraph
+
+WORD = 64
+
+
+def _batch_reachability(offsets, targets, source_ids):
+    """
+    Word-parallel BFS: bit j of a vertex's mask says that source_ids[j] reaches it,
+    so a single sweep over an edge pushes the frontier of every source in the batch at once.
+    Returns one bitmap per source, where bit v (of byte v // 8) says vertex id v is reachable.
+    """
+    n = len(offsets) - 1
+    seen = [0] * n
+    frontier = {}
+    for j, s in enumerate(source_ids):
+        seen[s] |= 1 << j
+        frontier[s] = frontier.get(s, 0) | 1 << j
+
+    while frontier:
+        next_frontier = {}
+        for u, bits in frontier.items():
+            for k in range(offsets[u], offsets[u + 1]):
+                w = targets[k]
+                new = bits & ~seen[w]
+                if new:
+                    seen[w] |= new
+                    next_frontier[w] = next_frontier.get(w, 0) | new
+        frontier = next_frontier
+
+    # transpose the vertex masks into one bitmap per source
+    bitmaps = [bytearray((n + 7) // 8) for _ in source_ids]
+    for v, bits in enumerate(seen):
+        byte, bit = v >> 3, 1 << (v & 7)
+        while bits:
+            low = bits & -bits
+            bitmaps[low.bit_length() - 1][byte] |= bit
+            bits ^= low
+    return [bytes(bitmap) for bitmap in bitmaps]
+
+
+_shared = None
+
+
+def _attach(offsets_name, offsets_len, targets_name, targets_len):
+    """
+    Pool initializer: maps the parent's shared CSR buffers into the worker without copying them
+    """
+    global _shared
+    offsets_shm, targets_shm = SharedMemory(name=offsets_name), SharedMemory(name=targets_name)
+    offsets = offsets_shm.buf[:8 * offsets_len].cast("q")
+    targets = targets_shm.buf[:4 * targets_len].cast("i")
+    _shared = (offsets_shm, targets_shm, offsets, targets)
+
+
+def _shared_batch_reachability(source_ids):
+    _, _, offsets, targets = _shared
+    return _batch_reachability(offsets, targets, source_ids)
+
+
+def _to_shared_memory(buf, itemsize):
+    shm = SharedMemory(create=True, size=max(1, itemsize * len(buf)))
+    shm.buf[:itemsize * len(buf)] = memoryview(buf).cast("B")
+    return shm
+
+
+def multi_source_reachability(graph: CSRGraph, sources, processes=1):
+    """
+    For every vertex of `sources`, a bitmap (`bytes`) of the vertex ids of `graph` it reaches:
+    id v is reachable iff `bitmap[v >> 3] >> (v & 7) & 1`.
+
+    Sources are processed 64 at a time by word-parallel BFS. With `processes` other than 1
+    (None meaning one per core) the batches are fanned out over a process pool whose workers
+    share a single copy of the CSR arrays in shared memory.
+    """
+    source_ids = [graph.id_of(s) for s in sources]
+    batches = [source_ids[i:i + WORD] for i in range(0, len(source_ids), WORD)]
+
+    if processes == 1:
+        results = [_batch_reachability(graph.offsets, graph.targets, batch) for batch in batches]
+        return [bitmap for batch in results for bitmap in batch]
+
+    offsets_shm = _to_shared_memory(graph.offsets, 8)
+    targets_shm = _to_shared_memory(graph.targets, 4)
+    try:
+        initargs = (offsets_shm.name, len(graph.offsets), targets_shm.name, len(graph.targets))
+        with Pool(processes, initializer=_attach, initargs=initargs) as pool:
+            results = pool.map(_shared_batch_reachability, batches)
+    finally:
+        for shm in (offsets_shm, targets_shm):
+            shm.close()
+            shm.unlink()
+
+    return [bitmap for batch in results for bitmap in batch]
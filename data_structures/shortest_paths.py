@@ -0,0 +1,195 @@
+from array import array
+from heapq import heappop, heappush
+
+from data_structures.graph import CSRGraph
+
+INF = float("inf")
+
+
+class ShortestPaths:
+    """
+    Shortest path queries over a CSRGraph: BFS, Dijkstra (binary heap) and bidirectional BFS
+
+    The distance and predecessor buffers are allocated once, and a query only resets
+    the entries the previous one touched. So thousands of queries per second don't allocate
+    fresh dicts. Each query returns the distance to its `target`, and afterwards `distance(v)` and
+    `path(v)` read the buffers. After a bidirectional query only the target's path is recorded.
+
+    Example:
+    >>> sp = ShortestPaths(CSRGraph.from_graph(G))
+    >>> sp.bfs("a", "z")          # hop count from a to z
+    >>> sp.path("z")              # ["a", ..., "z"]
+    >>> sp.dijkstra("a")          # explore everything, using the graph's edge weights
+    >>> sp.distance("q")
+    """
+
+    def __init__(self, graph: CSRGraph):
+        self.graph = graph
+        n = len(graph)
+        self._dist = array("d", [INF]) * n
+        self._pred = array("i", [-1]) * n
+        self._touched = []
+
+        # backward search buffers for bidirectional queries, allocated on first use
+        self._reverse = None
+        self._dist_back = self._pred_back = None
+        self._touched_back = []
+
+    def _reset(self):
+        dist, pred = self._dist, self._pred
+        for i in self._touched:
+            dist[i] = INF
+            pred[i] = -1
+        self._touched.clear()
+
+        dist, pred = self._dist_back, self._pred_back
+        for i in self._touched_back:
+            dist[i] = INF
+            pred[i] = -1
+        self._touched_back.clear()
+
+    def _start(self, source, target):
+        self._reset()
+        graph = self.graph
+        s = graph.id_of(source)
+        t = -1 if target is None else graph.id_of(target)
+        self._dist[s] = 0
+        self._touched.append(s)
+        return s, t
+
+    def bfs(self, source, target=None):
+        """
+        Unweighted distance from `source` to `target` (explores all of the graph if no target)
+        """
+        s, t = self._start(source, target)
+        offsets, targets = self.graph.offsets, self.graph.targets
+        dist, pred = self._dist, self._pred
+        touched = self._touched
+
+        # the touched list doubles as the BFS queue
+        head = 0
+        while head < len(touched):
+            u = touched[head]
+            head += 1
+            if u == t:
+                break
+            d = dist[u] + 1
+            for k in range(offsets[u], offsets[u + 1]):
+                w = targets[k]
+                if dist[w] == INF:
+                    dist[w] = d
+                    pred[w] = u
+                    touched.append(w)
+
+        return None if target is None else dist[t]
+
+    def dijkstra(self, source, target=None):
+        """
+        Weighted distance from `source` to `target` (explores all of the graph if no target).
+        Edges weigh 1 if the graph has no weights, and weights must be non-negative.
+        """
+        s, t = self._start(source, target)
+        graph = self.graph
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        dist, pred = self._dist, self._pred
+        touched = self._touched
+
+        heap = [(0.0, s)]
+        while heap:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            if u == t:
+                break
+            for k in range(offsets[u], offsets[u + 1]):
+                w = targets[k]
+                nd = d + (weights[k] if weights is not None else 1)
+                if nd < dist[w]:
+                    if dist[w] == INF:
+                        touched.append(w)
+                    dist[w] = nd
+                    pred[w] = u
+                    heappush(heap, (nd, w))
+
+        return None if target is None else dist[t]
+
+    def bidirectional(self, source, target):
+        """
+        Unweighted distance from `source` to `target`, growing a BFS from each end
+        (always the side with the smaller frontier) until they meet
+        """
+        if self._reverse is None:
+            graph = self.graph
+            self._reverse = CSRGraph.from_edges(graph.targets, graph.source_ids(), n=len(graph))
+            self._dist_back = array("d", [INF]) * len(graph)
+            self._pred_back = array("i", [-1]) * len(graph)
+
+        s, t = self._start(source, target)
+        dist_back, pred_back = self._dist_back, self._pred_back
+        dist_back[t] = 0
+        self._touched_back.append(t)
+        if s == t:
+            return 0
+
+        sides = [
+            (self.graph, self._dist, self._pred, self._dist_back, self._touched),
+            (self._reverse, self._dist_back, self._pred_back, self._dist, self._touched_back),
+        ]
+        frontiers = [[s], [t]]
+        best, meet = INF, -1
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            graph, dist, pred, other_dist, touched = sides[side]
+            offsets, targets = graph.offsets, graph.targets
+
+            # expand a whole level, so that the best meeting point found in it is optimal
+            frontier = []
+            for u in frontiers[side]:
+                d = dist[u] + 1
+                for k in range(offsets[u], offsets[u + 1]):
+                    w = targets[k]
+                    if dist[w] == INF:
+                        dist[w] = d
+                        pred[w] = u
+                        touched.append(w)
+                        frontier.append(w)
+                    if other_dist[w] != INF and dist[w] + other_dist[w] < best:
+                        best, meet = dist[w] + other_dist[w], w
+            frontiers[side] = frontier
+
+            if meet >= 0:
+                break
+
+        if meet < 0:
+            return INF
+
+        # record the backward half of the path as forward predecessors, so `path(target)` works
+        dist, pred = self._dist, self._pred
+        u = meet
+        while u != t:
+            w = pred_back[u]
+            if dist[w] == INF:
+                self._touched.append(w)
+            dist[w] = dist[u] + 1
+            pred[w] = u
+            u = w
+
+        return best
+
+    def distance(self, v):
+        return self._dist[self.graph.id_of(v)]
+
+    def path(self, v):
+        """
+        The vertices on the shortest path found to `v` by the last query, or None if it wasn't reached
+        """
+        i = self.graph.id_of(v)
+        if self._dist[i] == INF:
+            return None
+
+        vertices, pred = self.graph.vertices, self._pred
+        res = []
+        while i >= 0:
+            res.append(vertices[i])
+            i = pred[i]
+        return res[::-1]
@@ -1,6 +1,9 @@
+from array import array
 from itertools import product
 
-from data_structures.decision_grid import DecisionGrid
+import pytest
+
+from data_structures.decision_grid import DecisionGrid, DecisionGridFitter, PackedDecisionGrids
 
 dg_def = {
     2: 20,   # x < 2      ==> 20 <= y
@@ -44,3 +47,100 @@ def test_approved():
         actual = decider.is_approved(x, y)
         print(f"{(x,y)} -> {actual}")
         assert expected_approved == actual
+
+
+def test_approved_many():
+    decider = DecisionGrid(dg_def)
+    rows = list(product(range(-1, 10), range(-1, 25))) + [(1.5, 19.5), (2.0, 10.0), (7.99, 5), (1e9, -1e9)]
+    rows += [(9, float("nan")), (9.5, float("nan")), (3, float("nan"))]
+    xs, ys = array("d", (x for x, _ in rows)), [y for _, y in rows]
+
+    actual = decider.is_approved_many(xs, ys)
+    assert actual == [decider.is_approved(x, y) for x, y in rows]
+    assert decider.is_approved_many(iter(xs), iter(ys)) == actual
+    assert decider.is_approved_many([], []) == []
+
+
+def test_compiled():
+    plain = DecisionGrid(dg_def)
+    compiled = DecisionGrid(dg_def, x_range=(0, 9))
+    assert compiled._table is not None
+    assert not DecisionGrid(dg_def).compile(0, 10 ** 9)
+    assert not DecisionGrid(dg_def, x_range=(0, 100)).compile(0, 100, max_table_size=10)
+
+    rows = list(product(range(-3, 13), range(-1, 25))) + [(1.5, 20), (5.0, 9), (True, 20), (7.99, 5)]
+    # beyond the last cut any y is approved, even NaN, with or without the table
+    rows += [(9, float("nan")), (3, float("nan"))]
+    assert compiled.is_approved(9, float("nan")) and not compiled.is_approved(3, float("nan"))
+    for x, y in rows:
+        assert compiled.is_approved(x, y) == plain.is_approved(x, y)
+
+    xs, ys = [x for x, _ in rows], [y for _, y in rows]
+    assert compiled.is_approved_many(xs, ys) == plain.is_approved_many(xs, ys)
+    in_range = [(x, y) for x, y in rows if type(x) is int and 0 <= x <= 9]
+    xs, ys = array("l", (x for x, _ in in_range)), [y for _, y in in_range]
+    assert compiled.is_approved_many(xs, ys) == plain.is_approved_many(xs, ys)
+    assert str(compiled) == str(plain)
+
+
+def test_packed_grids(tmp_path):
+    cutoffs = [dg_def, {5: 1}, {1: 3, 2: 2, 3: 1}, {}]
+    grids = PackedDecisionGrids.from_grids([DecisionGrid(cutoffs[0])] + cutoffs[1:])
+    assert len(grids) == 4
+    assert list(grids.offsets) == [0, 3, 4, 7, 7]
+    for grid_id, expected in enumerate(cutoffs):
+        assert grids[grid_id].cutoffs == expected
+    # the cuts come back as floats, which still print like the original grid
+    assert str(grids[0]) == str(DecisionGrid(dg_def))
+    assert str(PackedDecisionGrids.from_grids([{2.5: 1.5}])[0]).splitlines()[1:3] == ["1.5|********", "  0|XXXX****"]
+
+    deciders = [DecisionGrid(c) for c in cutoffs]
+    triples = [(g, x, y) for g in range(4) for x, y in product(range(-1, 10), range(-1, 25))]
+    for g, x, y in triples:
+        assert grids.is_approved(g, x, y) == deciders[g].is_approved(x, y)
+    actual = grids.is_approved_many(*zip(*triples))
+    assert actual == [deciders[g].is_approved(x, y) for g, x, y in triples]
+
+    path = str(tmp_path / "grids.bin")
+    grids.save(path)
+    loaded = PackedDecisionGrids.load(path)
+    assert (loaded.x_cuts, loaded.y_cuts, loaded.offsets) == (grids.x_cuts, grids.y_cuts, grids.offsets)
+    assert loaded.is_approved_many(*zip(*triples)) == actual
+
+    for bad_id in (-1, 4):
+        with pytest.raises(IndexError, match=str(bad_id)):
+            grids[bad_id]
+        with pytest.raises(IndexError, match=str(bad_id)):
+            grids.is_approved(bad_id, 0, 0)
+        with pytest.raises(IndexError, match=str(bad_id)):
+            grids.is_approved_many([0, bad_id], [0, 0], [0, 0])
+
+    (tmp_path / "junk.bin").write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        PackedDecisionGrids.load(str(tmp_path / "junk.bin"))
+
+
+def test_fitter():
+    rows = [(x, y, DecisionGrid(dg_def).is_approved(x, y)) for x, y in product(range(10), range(25))]
+    fitter = DecisionGridFitter(x_edges=range(1, 10), y_edges=range(0, 25, 5))
+    fitter.update(rows[:100]).update(iter(rows[100:]))
+    assert fitter.fit().cutoffs == dg_def
+
+    halves = DecisionGridFitter(range(1, 10), range(0, 25, 5)).update(rows[::2])
+    halves.merge(DecisionGridFitter(range(1, 10), range(0, 25, 5)).update(rows[1::2]))
+    assert halves.fit().cutoffs == dg_def
+
+    with pytest.raises(ValueError):
+        fitter.merge(DecisionGridFitter([1], [1]))
+
+
+def test_fitter_noise_and_monotonicity():
+    # the noise at (6, 0) is cheaper to misclassify than to approve its whole bin, and x=3 on its own
+    # would be best off approving everything, but then so would x=4..7: its cut is kept at 10 instead
+    rows = [(x, y, y >= 10 or x >= 8) for x in range(10) for y in (0, 5, 10, 15)]
+    rows += [(6, 0, True), (3, 0, True), (3, 5, True), (3, 0, True), (3, 5, True)]
+    fitter = DecisionGridFitter(x_edges=range(1, 10), y_edges=[5, 10])
+    grid = fitter.update(rows).fit()
+    assert grid.cutoffs == {8: 10}
+
+    assert DecisionGridFitter([1, 2], [1]).fit().cutoffs == {}
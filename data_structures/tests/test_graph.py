@@ -1,4 +1,9 @@
-from data_structures.graph import Graph
+import random
+from array import array
+
+import pytest
+
+from data_structures.graph import CSRGraph, Graph
 
 from data_structures.tests.test_union_find import equal_sets_collection
 
@@ -66,4 +71,223 @@ def test_components():
     assert equal_sets_collection(expected, actual), actual
 
 
+def test_long_path_components():
+    n = 100000
+    adj_list = {i: [j for j in (i - 1, i + 1) if 0 <= j < n] for i in range(n)}
+    adj_list[n] = [n]
+
+    G = Graph(adjacency_list=adj_list)
+    assert G.is_undirected()
+
+    actual = G.get_components()
+    assert equal_sets_collection([set(range(n)), {n}], actual), len(actual)
+
+    G.add_edge(0, n)
+    assert not G.is_undirected()
+
+
+def test_incremental_components():
+    G = Graph(adjacency_list={1: [2], 2: [1], 3: []})
+    assert G.connected(1, 2)
+    assert not G.connected(2, 3)
+    assert G.component_size(3) == 1
+
+    G.add_vertex(4)
+    G.add_edge(3, 4)
+    G.add_edge(4, 3)
+    assert G.connected(3, 4)
+    assert G.component_size(4) == 2
+    assert equal_sets_collection([{1, 2}, {3, 4}], G.get_components())
+
+    G.add_edge(5, 2)
+    G.add_edge(2, 5)
+    G.add_edge(5, 3)
+    G.add_edge(3, 5)
+    assert G.connected(1, 4)
+    assert G.component_size(5) == 5
+    assert equal_sets_collection([{1, 2, 3, 4, 5}], G.get_components())
+
+    # querying vertices that aren't in the graph doesn't add them to the index
+    with pytest.raises(KeyError):
+        G.connected(1, 99)
+    with pytest.raises(KeyError):
+        G.component_size("typo")
+    assert equal_sets_collection([{1, 2, 3, 4, 5}], G.get_components())
+
+    # the un-directed check follows the edges as they are added
+    G.add_edge(1, 6)
+    G.add_edge(1, 6)
+    assert not G.is_undirected()
+    G.add_edge(6, 1)
+    G.add_edge(6, 6)
+    assert G.is_undirected()
+
+
+def test_csr():
+    adj_list = {
+        "a": ["b", "c"],
+        "b": ["a"],
+        "c": ["a"],
+        "d": [],
+        "e": ["f"],
+        "f": ["e"],
+    }
+    csr = CSRGraph.from_graph(Graph(adjacency_list=adj_list))
+    assert len(csr) == 6
+    assert csr.num_edges() == 6
+    assert list(csr.offsets) == [0, 2, 3, 4, 4, 5, 6]
+    assert list(csr.targets) == [1, 2, 0, 0, 5, 4]
+    for v, edges in adj_list.items():
+        assert list(csr.neighbors(v)) == edges
+        assert csr.degree(v) == len(edges)
+
+    expected = [{"a", "b", "c"}, {"d"}, {"e", "f"}]
+    assert equal_sets_collection(expected, csr.get_components())
+
+
+def test_csr_from_edges():
+    sources = array("i", [3, 0, 3, 1])
+    targets = array("i", [0, 1, 1, 2])
+    csr = CSRGraph.from_edges(sources, targets, n=5)
+    assert len(csr) == 5
+    assert list(csr.offsets) == [0, 1, 2, 2, 4, 4]
+    assert list(csr.targets) == [1, 2, 0, 1]
+    assert list(csr.neighbors(3)) == [0, 1]
+    assert csr.degree(4) == 0
+    assert list(csr.source_ids()) == [0, 1, 3, 3]
+    assert equal_sets_collection([{0, 1, 2, 3}, {4}], csr.get_components())
+
+    labelled = CSRGraph.from_edges([0], [1], vertices=["x", "y", "z"])
+    assert list(labelled.neighbors("x")) == ["y"]
+    assert equal_sets_collection([{"x", "y"}, {"z"}], labelled.get_components())
+
+
 test_components()
+
+
+def test_strongly_connected_components():
+    adj_list = {
+        "a": ["b"],
+        "b": ["c", "e"],
+        "c": ["a", "d"],
+        "d": [],
+        "e": ["f"],
+        "f": ["e", "d"],
+        "g": [],
+    }
+    G = Graph(adjacency_list=adj_list)
+    comps = G.strongly_connected_components()
+    assert equal_sets_collection([{"a", "b", "c"}, {"e", "f"}, {"d"}, {"g"}], comps)
+
+    position = {v: i for i, comp in enumerate(comps) for v in comp}
+    for v1, edges in adj_list.items():
+        for v2 in edges:
+            assert position[v1] <= position[v2]
+
+    dag, dag_comps = G.condensation()
+    assert dag_comps == comps
+    abc, ef, d = position["a"], position["e"], position["d"]
+    assert sorted(dag.adjacency_list[abc]) == sorted([ef, d])
+    assert dag.adjacency_list[ef] == [d]
+    assert dag.topological_sort()
+
+    with pytest.raises(ValueError):
+        G.topological_sort()
+
+
+def test_long_cycle_scc():
+    n = 100000
+    csr = CSRGraph.from_edges(range(n), [(i + 1) % n for i in range(n)], n=n + 1)
+    comp_count, labels = csr.scc_labels()
+    assert comp_count == 2
+    assert labels[0] == labels[n - 1] != labels[n]
+
+
+def test_topological_sort():
+    adj_list = {
+        "shirt": ["tie", "belt"],
+        "tie": ["jacket"],
+        "pants": ["shoes", "belt"],
+        "belt": ["jacket"],
+        "socks": ["shoes"],
+        "shoes": [],
+        "jacket": [],
+    }
+    G = Graph(adjacency_list=adj_list)
+    order = G.topological_sort()
+    assert sorted(order) == sorted(adj_list)
+    position = {v: i for i, v in enumerate(order)}
+    for v1, edges in adj_list.items():
+        for v2 in edges:
+            assert position[v1] < position[v2]
+
+    levels = [set(level) for level in G.topological_levels()]
+    assert levels == [{"shirt", "pants", "socks"}, {"tie", "belt", "shoes"}, {"jacket"}]
+
+
+def test_weighted_edges():
+    G = Graph()
+    G.add_edge("a", "b", 2.5)
+    G.add_edge("a", "c")
+    assert G.adjacency_list == {"a": ["b", "c"], "b": [], "c": []}
+    assert G.weights["a"] == [2.5, 1]
+
+    # weights are only kept once the first one is given
+    late = Graph(adjacency_list={"a": ["b"], "b": ["a"]})
+    assert not late.weights
+    late.add_edge("b", "c", 3)
+    late.add_edge("c", "a")
+    assert late.weights == {"a": [1], "b": [1, 3], "c": [1]}
+
+    csr = CSRGraph.from_graph(G)
+    assert list(csr.weights) == [2.5, 1.0]
+    assert CSRGraph.from_graph(Graph(adjacency_list={1: [2]})).weights is None
+
+
+def undirected_weighted_graph(weighted_edges):
+    G = Graph()
+    for v1, v2, w in weighted_edges:
+        G.add_edge(v1, v2, w)
+        G.add_edge(v2, v1, w)
+    return G
+
+
+def forest_weight(forest):
+    return sum(w for _, _, w in forest)
+
+
+def test_minimum_spanning_forest():
+    G = undirected_weighted_graph([
+        ("a", "b", 4), ("a", "h", 8), ("b", "c", 8), ("b", "h", 11), ("c", "d", 7),
+        ("c", "f", 4), ("c", "i", 2), ("d", "e", 9), ("d", "f", 14), ("e", "f", 10),
+        ("f", "g", 2), ("g", "h", 1), ("g", "i", 6), ("h", "i", 7), ("x", "y", 3),
+    ])
+    G.add_vertex("z")
+
+    for algorithm in ("kruskal", "boruvka"):
+        forest = G.minimum_spanning_forest(algorithm=algorithm)
+        assert len(forest) == 9
+        assert forest_weight(forest) == 37 + 3
+        # the weights come back as they were given, not as the CSR's floats
+        assert all(type(w) is int and w == G.weights[v1][G.adjacency_list[v1].index(v2)] for v1, v2, w in forest)
+
+        F = undirected_weighted_graph(forest)
+        F.add_vertex("z")
+        assert equal_sets_collection(G.get_components(), F.get_components())
+
+    with pytest.raises(ValueError):
+        G.minimum_spanning_forest(algorithm="prim")
+
+
+def test_parallel_boruvka():
+    random.seed(42)
+    n = 200
+    edges = [(random.randrange(n), random.randrange(n), random.randrange(100)) for _ in range(600)]
+    G = undirected_weighted_graph(edges)
+
+    kruskal = G.minimum_spanning_forest()
+    boruvka = G.minimum_spanning_forest(algorithm="boruvka", processes=2)
+    assert len(kruskal) == len(boruvka) == len(G.adjacency_list) - len(G.get_components())
+    assert forest_weight(kruskal) == forest_weight(boruvka)
+
+    assert Graph().minimum_spanning_forest(algorithm="boruvka", processes=2) == []
@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+from data_structures.graph import CSRGraph, Graph
+from data_structures.graph_io import load_snapshot, read_edge_list, save_snapshot
+
+from data_structures.tests.test_union_find import equal_sets_collection
+
+EDGES = """\
+# source,target,weight
+10,20,1.5
+20,10,1.5
+
+30,40,2
+10,30,0.5
+"""
+
+
+def test_read_edge_list():
+    csr = read_edge_list(io.StringIO(EDGES), delimiter=",", weighted=True, chunk_size=2)
+    assert list(csr.vertices) == [10, 20, 30, 40]
+    assert list(csr.neighbors(10)) == [20, 30]
+    assert list(csr.weights) == [1.5, 0.5, 1.5, 2.0]
+    assert csr.degree(40) == 0
+    assert equal_sets_collection([{10, 20, 30, 40}], csr.get_components())
+
+    csr = read_edge_list(io.StringIO("a b\nb c\n"), vertex=str)
+    assert list(csr.vertices) == ["a", "b", "c"]
+    assert csr.weights is None
+    assert list(csr.neighbors("b")) == ["c"]
+
+    # chunks are split in one go, or line by line when some line has extra fields
+    csr = read_edge_list(io.StringIO("1 2\n2 3 4 5\n3 1\n"), chunk_size=3)
+    assert list(csr.vertices) == [1, 2, 3] and list(csr.neighbors(2)) == [3]
+    with pytest.raises(ValueError):
+        read_edge_list(io.StringIO("1 2\n3\n"))
+
+
+def test_read_edge_list_path(tmp_path):
+    path = tmp_path / "edges.csv"
+    path.write_text(EDGES)
+    csr = read_edge_list(str(path), delimiter=",")
+    assert csr.num_edges() == 4
+    assert list(csr.neighbors(30)) == [40]
+
+
+def assert_same_graph(expected, actual):
+    assert list(actual.vertices) == list(expected.vertices)
+    assert list(actual.offsets) == list(expected.offsets)
+    assert list(actual.targets) == list(expected.targets)
+    if expected.weights is None:
+        assert actual.weights is None
+    else:
+        assert list(actual.weights) == list(expected.weights)
+
+
+def test_snapshot(tmp_path):
+    graphs = [
+        read_edge_list(io.StringIO(EDGES), delimiter=",", weighted=True),
+        CSRGraph.from_graph(Graph(adjacency_list={"x": ["yy", "zzz"], "yy": ["x"], "zzz": [], "ünï": ["x"]})),
+        CSRGraph.from_edges([0, 2], [1, 3], n=5),
+        CSRGraph.from_edges([], [], n=0),
+    ]
+    for i, expected in enumerate(graphs):
+        path = str(tmp_path / f"graph{i}.csr")
+        save_snapshot(expected, path)
+        actual = load_snapshot(path)
+        assert_same_graph(expected, actual)
+        for v in expected.vertices:
+            assert list(actual.neighbors(v)) == list(expected.neighbors(v))
+        assert equal_sets_collection(expected.get_components(), actual.get_components())
+
+    assert isinstance(load_snapshot(str(tmp_path / "graph2.csr")).vertices, range)
+    assert expected._buffer is None and load_snapshot(str(tmp_path / "graph2.csr"))._buffer is not None
@@ -0,0 +1,36 @@
+import random
+
+from data_structures.graph import CSRGraph, Graph
+from data_structures.reachability import multi_source_reachability
+from data_structures.shortest_paths import INF, ShortestPaths
+
+
+def reachable(bitmap, n):
+    return {v for v in range(n) if bitmap[v >> 3] >> (v & 7) & 1}
+
+
+def test_small():
+    G = Graph(adjacency_list={"a": ["b"], "b": ["c"], "c": [], "d": ["a"], "e": []})
+    csr = CSRGraph.from_graph(G)
+    bitmaps = multi_source_reachability(csr, ["a", "d", "e", "c"])
+    assert [reachable(bm, len(csr)) for bm in bitmaps] == [{0, 1, 2}, {0, 1, 2, 3}, {4}, {2}]
+    assert all(len(bm) == 1 for bm in bitmaps)
+
+
+def test_against_bfs():
+    random.seed(42)
+    n = 400
+    sources = [random.randrange(n) for _ in range(600)]
+    targets = [random.randrange(n) for _ in range(600)]
+    csr = CSRGraph.from_edges(sources, targets, n=n)
+
+    seeds = list(range(0, n, 3))
+    sequential = multi_source_reachability(csr, seeds)
+    parallel = multi_source_reachability(csr, seeds, processes=2)
+    assert sequential == parallel
+    assert len(parallel) == len(seeds)
+
+    sp = ShortestPaths(csr)
+    for s, bitmap in zip(seeds, parallel):
+        sp.bfs(s)
+        assert reachable(bitmap, n) == {v for v in range(n) if sp.distance(v) != INF}
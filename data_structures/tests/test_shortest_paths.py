@@ -0,0 +1,77 @@
+import random
+
+from data_structures.graph import CSRGraph, Graph
+from data_structures.shortest_paths import INF, ShortestPaths
+
+
+def grid_graph(width, height):
+    adj_list = {}
+    for x in range(width):
+        for y in range(height):
+            adj_list[(x, y)] = [
+                (x + dx, y + dy)
+                for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if 0 <= x + dx < width and 0 <= y + dy < height
+            ]
+    return Graph(adjacency_list=adj_list)
+
+
+def test_bfs():
+    sp = ShortestPaths(CSRGraph.from_graph(grid_graph(5, 4)))
+    assert sp.bfs((0, 0), (4, 3)) == 7
+    path = sp.path((4, 3))
+    assert path[0] == (0, 0) and path[-1] == (4, 3) and len(path) == 8
+
+    assert sp.bfs((2, 2)) is None
+    assert sp.distance((0, 0)) == 4
+    assert sp.distance((2, 2)) == 0
+    assert sp.path((2, 2)) == [(2, 2)]
+
+
+def test_unreachable():
+    G = Graph(adjacency_list={1: [2], 2: [], 3: [1]})
+    sp = ShortestPaths(CSRGraph.from_graph(G))
+    assert sp.bfs(1, 3) == INF
+    assert sp.path(3) is None
+    assert sp.dijkstra(1, 3) == INF
+    assert sp.bidirectional(1, 3) == INF
+    assert sp.bidirectional(3, 2) == 2
+    assert sp.path(2) == [3, 1, 2]
+
+
+def test_dijkstra():
+    sources = [0, 0, 1, 2, 1, 3]
+    targets = [1, 2, 2, 3, 3, 4]
+    weights = [4, 1, 2, 5, 10, 3]
+    sp = ShortestPaths(CSRGraph.from_edges(sources, targets, n=6, weights=weights))
+
+    assert sp.dijkstra(0, 4) == 9
+    assert sp.path(4) == [0, 2, 3, 4]
+    assert sp.dijkstra(1) is None
+    assert sp.distance(4) == 10
+    assert sp.distance(0) == INF
+    assert sp.distance(5) == INF
+
+    # without weights every edge weighs 1
+    sp = ShortestPaths(CSRGraph.from_edges(sources, targets, n=6))
+    assert sp.dijkstra(0, 4) == 3
+
+
+def test_queries_agree():
+    random.seed(42)
+    n = 300
+    adj_list = {v: [] for v in range(n)}
+    for _ in range(700):
+        v, w = random.randrange(n), random.randrange(n)
+        adj_list[v].append(w)
+
+    sp = ShortestPaths(CSRGraph.from_graph(Graph(adjacency_list=adj_list)))
+    for _ in range(200):
+        s, t = random.randrange(n), random.randrange(n)
+        expected = sp.bfs(s, t)
+        assert sp.dijkstra(s, t) == expected
+        assert sp.bidirectional(s, t) == expected
+        if expected != INF:
+            path = sp.path(t)
+            assert path[0] == s and path[-1] == t and len(path) == expected + 1
+            assert all(w in adj_list[v] for v, w in zip(path, path[1:]))
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from data_structures.zree import SortedDict
+
+
+def test_mapping():
+    sd = SortedDict({30: "z", 10: "x"}, **{})
+    sd[20] = "y"
+    sd[10] = "X"
+    assert list(sd) == [10, 20, 30]
+    assert list(sd.keys()) == [10, 20, 30]
+    assert list(sd.values()) == ["X", "y", "z"]
+    assert list(sd.items()) == [(10, "X"), (20, "y"), (30, "z")]
+    assert list(reversed(sd.items())) == [(30, "z"), (20, "y"), (10, "X")]
+    assert list(reversed(sd)) == list(reversed(sd.keys())) == [30, 20, 10]
+    assert sd == {10: "X", 20: "y", 30: "z"}
+    assert 20 in sd and 25 not in sd
+    assert sd.get(25) is None
+    assert (20, "y") in sd.items()
+    assert repr(sd) == "SortedDict({10: 'X', 20: 'y', 30: 'z'})"
+
+    del sd[20]
+    assert list(sd.items()) == [(10, "X"), (30, "z")]
+    with pytest.raises(KeyError):
+        del sd[20]
+    with pytest.raises(KeyError):
+        sd[20]
+
+    assert SortedDict(b=2, a=1).popitem() == ("b", 2)
+
+    # keys only need to be comparable, and the last of repeated keys wins
+    lists = SortedDict([([2], "b"), ([1], "a"), ([2], "B")])
+    assert list(lists.items()) == [([1], "a"), ([2], "B")] and len(lists) == 2
+    assert lists[[2]] == "B"
+    assert repr(lists) == "SortedDict({[1]: 'a', [2]: 'B'})"
+    assert lists == lists and lists == SortedDict([([1], "a"), ([2], "B")])
+    assert lists != SortedDict([([1], "a"), ([2], "b")]) and lists != SortedDict([([1], "a")])
+    assert list(reversed(lists.keys())) == [[2], [1]]
+    assert list(SortedDict({1: "a"}, **{}).items()) == [(1, "a")]
+    with pytest.raises(TypeError):
+        SortedDict({}, {})
+
+
+def test_navigation():
+    sd = SortedDict((k, str(k)) for k in range(0, 100, 10))
+    assert sd.floor(25) == 20 and sd.floor(20) == 20 and sd.floor(-1) is None
+    assert sd.ceiling(25) == 30 and sd.ceiling(30) == 30 and sd.ceiling(91) is None
+    assert sd.predecessor(20) == 10 and sd.predecessor(0) is None
+    assert sd.successor(20) == 30 and sd.successor(90) is None
+
+    assert list(sd.irange(20, 50)) == [20, 30, 40]
+    assert list(sd.irange(20, 50, inclusive=(False, True), reverse=True)) == [50, 40, 30]
+    assert list(sd.islice(-2)) == [80, 90]
+    assert sd.index(40) == 4
+    assert sd.peekitem(0) == (0, "0")
+    assert sd.peekitem() == (90, "90")
+    with pytest.raises(KeyError):
+        sd.index(45)
+
+    assert sd.pop_first(3) == [(0, "0"), (10, "10"), (20, "20")]
+    with pytest.raises(ValueError):
+        sd.pop_first(-1)
+    assert sd.delete_range(40, 70) == 3
+    assert list(sd.items()) == [(30, "30"), (70, "70"), (80, "80"), (90, "90")]
+    assert sd.popitem(1) == (70, "70")
+    assert sd.delete_range() == 3
+    assert not sd
+    with pytest.raises(KeyError):
+        sd.popitem()
+
+
+def test_against_dict():
+    random.seed(11)
+    sd, expected = SortedDict(), {}
+    for i in range(3000):
+        key = random.randrange(500)
+        if key in expected and random.random() < 0.4:
+            del sd[key]
+            del expected[key]
+        else:
+            sd[key] = expected[key] = i
+
+    assert list(sd.items()) == sorted(expected.items())
+    assert len(sd) == len(expected)
+    for key in range(500):
+        assert sd.get(key) == expected.get(key)
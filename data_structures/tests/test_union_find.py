@@ -1,4 +1,15 @@
-from data_structures.union_find import UnionFind
+import random
+from array import array
+
+import pytest
+
+from data_structures.union_find import (
+    CompactUnionFind,
+    RollbackUnionFind,
+    UnionFind,
+    WeightedUnionFind,
+    parallel_union_find,
+)
 
 
 def test_init():
@@ -88,3 +99,296 @@ def test_sets():
     expected = [{1}, {2, 3}]
     actual = ds.sets()
     assert equal_sets_collection(expected, actual), actual
+
+
+def test_long_chain_components():
+    n = 20000
+    ds = UnionFind(range(n))
+    for i in range(n - 1):
+        ds.union(i, i + 1)
+        assert ds.component_size(i) == i + 2
+
+    assert len(ds) == 1
+    assert ds.component(0) == set(range(n))
+    assert ds.sets() == [set(range(n))]
+
+    ds = UnionFind(range(6))
+    ds.union(0, 1)
+    ds.union(2, 3)
+    ds.union(4, 5)
+    ds.union(1, 3)
+    assert ds.component(5) == {4, 5}
+    assert ds.component(0) == ds.component(2) == {0, 1, 2, 3}
+
+
+def test_compact_union_find():
+    ds = CompactUnionFind(4)
+    assert len(ds) == 4
+    assert ds.find(3) == 3
+
+    assert 3 == ds.union(2, 3)
+    assert ds.union(3, 2) is None
+    assert ds.connected(2, 3)
+    assert not ds.connected(1, 3)
+    assert ds.component_size(2) == 2
+    assert ds.component(2) == {2, 3}
+    assert len(ds) == 3
+
+    # union by size: the singleton gets attached under the bigger root
+    assert 3 == ds.union(3, 0)
+    assert ds.component_size(0) == 3
+    assert equal_sets_collection([{0, 2, 3}, {1}], ds.sets())
+
+    with pytest.raises(KeyError):
+        ds.find(4)
+    with pytest.raises(KeyError):
+        ds.find(-1)
+
+
+def test_compact_long_chain():
+    n = 100000
+    ds = CompactUnionFind(n)
+    for i in range(n - 1):
+        ds.union(i + 1, i)
+    assert len(ds) == 1
+    assert ds.component_size(0) == n
+    assert ds.connected(0, n - 1)
+
+
+def test_compact_eq_neq():
+    ds1 = CompactUnionFind(3)
+    ds2 = CompactUnionFind(3)
+    assert ds1 == ds2
+
+    ds1.union(2, 1)
+    ds2.union(1, 2)
+    assert ds1 == ds2
+
+    ds1.union(0, 1)
+    assert ds1 != ds2
+    assert ds1 != CompactUnionFind(4)
+
+
+def test_union_many_find_many():
+    ds = UnionFind([1, 2, 3, 4])
+    assert ds.union_many([2, 1, 3], [3, 4, 2]) == [3, 4, 3]
+    assert ds.find_many([1, 2, 3, 4]) == [4, 3, 3, 4]
+    assert len(ds) == 2
+
+
+def test_compact_union_many_find_many():
+    random.seed(42)
+    n = 1000
+    xs = [random.randrange(n) for _ in range(700)]
+    ys = [random.randrange(n) for _ in range(700)]
+
+    bulk, one_by_one = CompactUnionFind(n), CompactUnionFind(n)
+    reps = bulk.union_many(xs, ys)
+    for x, y, rep in zip(xs, ys, reps):
+        one_by_one.union(x, y)
+        assert bulk.connected(y, rep)
+
+    assert bulk == one_by_one
+    assert len(bulk) == len(one_by_one)
+
+    few = bulk.find_many(xs[:3])
+    assert list(few) == [bulk.find(x) for x in xs[:3]]
+    everything = bulk.find_many(range(n))
+    assert list(everything) == [bulk.find(x) for x in range(n)]
+
+    with pytest.raises(KeyError):
+        bulk.union_many([0, 1], [2, n])
+    assert bulk.connected(0, 2)
+    assert len(bulk) == len(one_by_one) - (not one_by_one.connected(0, 2))
+    with pytest.raises(KeyError):
+        bulk.find_many(range(n + 1))
+
+
+def test_add():
+    ds = UnionFind([1, 2])
+    assert ds.add(2, 3, 4)
+    assert not ds.add(1, 4)
+    assert len(ds) == 4
+    assert ds.union(3, 4) == 4
+    assert ds.component(3) == {3, 4}
+
+    with pytest.raises(KeyError):
+        ds.find(5)
+
+    auto = UnionFind(auto_add=True)
+    assert auto.find("a") == "a"
+    auto.union("b", "c")
+    assert auto.connected("c", "b")
+    assert len(auto) == 2
+    expected = UnionFind(["a", "b", "c"])
+    expected.union("b", "c")
+    assert auto == expected
+
+
+def test_compact_add():
+    ds = CompactUnionFind(2)
+    assert ds.add(1, 5)
+    assert not ds.add(0, 5)
+    assert 5 in ds and 3 not in ds
+    assert len(ds) == 3
+    assert len(ds._parent) == 6
+
+    ds.add(6)
+    assert len(ds._parent) == 12
+    assert ds.union(5, 6) == 6
+    assert equal_sets_collection([{0}, {1}, {5, 6}], ds.sets())
+
+    with pytest.raises(KeyError):
+        ds.find(3)
+    with pytest.raises(KeyError):
+        ds.union_many([0], [4])
+    with pytest.raises(ValueError):
+        ds.add(-1)
+
+    grown = CompactUnionFind(2)
+    grown.union(0, 1)
+    grown.add(3)
+    expected = CompactUnionFind(4)
+    expected.union(0, 1)
+    assert grown != expected
+    grown.add(2)
+    assert grown == expected
+
+    auto = CompactUnionFind(auto_add=True)
+    assert auto.find(7) == 7
+    assert list(auto.union_many([1, 2, 100], [2, 3, 7])) == [2, 2, 7]
+    assert len(auto) == 2
+    assert auto.component(7) == {7, 100}
+    assert list(auto.find_many([1, 2, 3])) == [2, 2, 2]
+
+
+def test_rollback():
+    ds = RollbackUnionFind(range(6))
+    ds.union(0, 1)
+    start = ds.checkpoint()
+    before = ds.sets()
+
+    ds.union(2, 3)
+    middle = ds.checkpoint()
+    ds.union(1, 3)
+    ds.union(4, 5)
+    ds.union(5, 0)
+    assert len(ds) == 1
+    assert ds.component(2) == set(range(6))
+    assert ds.component_size(4) == 6
+
+    ds.rollback(middle)
+    assert len(ds) == 4
+    assert ds.connected(2, 3) and ds.connected(0, 1)
+    assert not ds.connected(1, 3)
+    assert ds.component(5) == {5}
+    assert ds.component(3) == {2, 3}
+
+    ds.rollback(start)
+    assert equal_sets_collection(before, ds.sets())
+    assert ds.component_size(0) == 2
+
+    with pytest.raises(ValueError):
+        ds.rollback(start + 1)
+
+    ds.rollback(0)
+    assert len(ds) == 6
+    assert all(ds._rank[x] == 0 for x in range(6))
+
+
+def test_parallel_union_find():
+    random.seed(42)
+    n = 2000
+    xs = [random.randrange(n) for _ in range(1500)]
+    ys = [random.randrange(n) for _ in range(1500)]
+
+    sequential = CompactUnionFind(n)
+    for x, y in zip(xs, ys):
+        sequential.union(x, y)
+
+    parallel = parallel_union_find(n, array("i", xs), array("i", ys), processes=2)
+    assert parallel == sequential
+    assert len(parallel) == len(sequential)
+    # every element points straight at its root, and the member lists were kept up to date
+    assert all(parallel._parent[root] == root for root in parallel._parent)
+    assert sorted(map(sorted, parallel.sets())) == sorted(map(sorted, sequential.sets()))
+    assert parallel_union_find(n, xs, ys, processes=3) == sequential
+
+    assert parallel_union_find(3, [], [], processes=1) == CompactUnionFind(3)
+
+    with pytest.raises(KeyError):
+        parallel_union_find(3, [0], [3], processes=1)
+    with pytest.raises(KeyError):
+        parallel_union_find(3, [0, 1, 2], [0, 1, 3], processes=2)
+    with pytest.raises(ValueError):
+        parallel_union_find(3, [0], [], processes=2)
+
+
+def test_canonical_labels():
+    ds = UnionFind([1, 2, 3, 4])
+    ds.union(4, 2)
+    ds.union(3, 4)
+    assert ds.canonical_labels() == {1: 1, 2: 2, 3: 2, 4: 2}
+
+    other = UnionFind([1, 2, 3, 4])
+    other.union(2, 3)
+    assert ds != other
+    other.union(2, 4)
+    assert ds == other
+    assert hash(ds) == hash(other)
+
+    # equality and hashing don't need the elements to be ordered
+    mixed, other_mixed = UnionFind(["a", 1, (2,)]), UnionFind(["a", 1, (2,)])
+    mixed.union("a", 1)
+    other_mixed.union(1, "a")
+    assert mixed == other_mixed
+    assert hash(mixed) == hash(other_mixed)
+    other_mixed.union(1, (2,))
+    assert mixed != other_mixed
+
+    compact = CompactUnionFind(5)
+    compact.union(4, 2)
+    compact.union(3, 4)
+    compact.add(7)
+    assert list(compact.canonical_labels()) == [0, 1, 2, 2, 2, -1, -1, 7]
+
+    same = CompactUnionFind()
+    same.add(0, 1, 2, 3, 4, 7)
+    same.union(2, 3)
+    assert same != compact
+    same.union(3, 4)
+    assert len(same._parent) != len(compact._parent)
+    assert same == compact
+    assert hash(same) == hash(compact)
+
+
+def test_weighted_union_find():
+    ds = WeightedUnionFind("abcde")
+    ds.union("a", "b", 3)   # a - b == 3
+    ds.union("c", "b", -2)  # c - b == -2
+    ds.union("d", "c", 10)  # d - c == 10
+    assert ds.diff("a", "c") == 5
+    assert ds.diff("c", "a") == -5
+    assert ds.diff("d", "a") == 5
+    assert ds.diff("b", "b") == 0
+    assert len(ds) == 2
+    assert ds.component_size("d") == 4
+
+    ds.union("a", "d", -5)  # consistent, nothing changes
+    assert len(ds) == 2
+    with pytest.raises(ValueError):
+        ds.union("a", "d", 0)
+    with pytest.raises(ValueError):
+        ds.diff("a", "e")
+
+    n = 10000
+    chain = WeightedUnionFind(range(n))
+    for i in range(n - 1):
+        chain.union(i + 1, i, 1)
+    assert chain.diff(n - 1, 0) == n - 1
+    assert chain.diff(1234, 5678) == 1234 - 5678
+
+    clocks = WeightedUnionFind(range(3), tolerance=1e-9)
+    clocks.union(0, 1, 0.1)
+    clocks.union(1, 2, 0.2)
+    clocks.union(0, 2, 0.3)
@@ -1,3 +1,4 @@
+import bisect
 import math
 import random
 
@@ -7,6 +8,16 @@ import pytest
 from data_structures.zree import SortedList
 
 
+def inserted(it):
+    """
+    SortedList grown by repeated `add`s rather than bulk loaded, as the pluck tests depend on its shape
+    """
+    sl = SortedList()
+    for x in it:
+        sl.add(x)
+    return sl
+
+
 def test_pluck_successor_as_root():
     verbose = False
 
@@ -53,12 +64,12 @@ def test_pluck_successor_as_root():
     print("small2.tree_print() SHOULD __still__ HAVE 10 ON TOP WITH NO SUCCESSOR")
     small2.tree_print()
 
-    bigger = SortedList(range(100))
+    bigger = inserted(range(100))
     if verbose:
         print("bigger.tree_print()")
         bigger.tree_print()
 
-    bigger2 = SortedList(range(63))
+    bigger2 = inserted(range(63))
     for i in range(64, 100):
         bigger2.add(i)
     if verbose:
@@ -125,7 +136,7 @@ def test_pluck_predecessor_as_root():
     print("small2.tree_print() SHOULD __still__ HAVE 0 ON TOP WITH NO PREDECESSOR")
     small2.tree_print()
 
-    bigger = SortedList(range(100))
+    bigger = inserted(range(100))
     if verbose:
         print("bigger.tree_print()")
         bigger.tree_print()
@@ -137,7 +148,7 @@ def test_pluck_predecessor_as_root():
         try:
             expected_pred = max(j for j in bigger if j < prev_root_val)
         except ValueError as ve:
-            assert i == 97
+            assert i == 98  # plucking used to drop the predecessor's child when it was the root's own child
             assert "max() arg is an empty sequence" == str(ve)
             break
 
@@ -176,7 +187,7 @@ def test_big():
     assert length == 1000
 
     height = thou_zsl._zree.height()
-    assert height == 11
+    assert height == 9  # bulk loaded, so perfectly balanced
     assert height < 1.45 * math.log(length, 2)
 
     thou_srtd = SortedList(range(1000), verbose=verbose)
@@ -219,7 +230,8 @@ def test_equals():
     sl3 = SortedList(range(1000))
 
     assert sl1 == sl2
-    assert sl1._zree != sl2._zree
+    assert sl1._zree == sl2._zree  # bulk loading doesn't depend on the input order
+    assert inserted(range(1000))._zree != inserted(range(999, -1, -1))._zree
 
     assert sl1 == sl3
     assert sl1._zree == sl3._zree
@@ -240,3 +252,150 @@ def test_class_comment():
     assert sl.minimum() == -5
     assert sl.maximum() == 1337
     sl.remove(1337)
+
+
+def test_order_statistics():
+    random.seed(1337)
+    sl, expected = SortedList(), []
+    for _ in range(2000):
+        x = random.randrange(300)
+        if expected and random.random() < 0.3:
+            x = random.choice(expected)
+            sl.remove(x)
+            expected.remove(x)
+        else:
+            sl.add(x)
+            bisect.insort(expected, x)
+
+    assert sl._zree.root.size == len(expected)
+    for node in sl._zree.root:
+        assert node.size == 1 + sum(child.size for child in node.children())
+
+    for i in range(-len(expected), len(expected)):
+        assert sl[i] == expected[i]
+    assert sl[10:20] == expected[10:20]
+    assert sl[::-7] == expected[::-7]
+    assert sl[-5:] == expected[-5:]
+
+    for x in range(-1, 301):
+        assert sl.bisect_left(x) == bisect.bisect_left(expected, x)
+        assert sl.bisect_right(x) == bisect.bisect_right(expected, x)
+        assert sl.count(x) == expected.count(x)
+        if x in expected:
+            assert sl.index(x) == expected.index(x)
+        else:
+            with pytest.raises(ValueError):
+                sl.index(x)
+
+    with pytest.raises(IndexError):
+        sl[len(expected)]
+    with pytest.raises(IndexError):
+        SortedList()[0]
+
+
+def test_irange_islice():
+    random.seed(7)
+    expected = sorted(random.randrange(100) for _ in range(500))
+    sl = SortedList(expected)
+
+    for lo, hi in [(None, None), (10, 20), (None, 50), (50, None), (-5, 0), (42, 42), (99, 200), (30, 10)]:
+        for inclusive in [(True, False), (True, True), (False, True), (False, False)]:
+            def keep(x):
+                above = lo is None or (lo <= x if inclusive[0] else lo < x)
+                below = hi is None or (x <= hi if inclusive[1] else x < hi)
+                return above and below
+
+            in_range = [x for x in expected if keep(x)]
+            assert list(sl.irange(lo, hi, inclusive=inclusive)) == in_range, (lo, hi, inclusive)
+            assert list(sl.irange(lo, hi, inclusive=inclusive, reverse=True)) == in_range[::-1]
+
+    for start, stop in [(None, None), (0, 10), (490, 600), (-20, -3), (250, 100), (None, 0), (499, None)]:
+        assert list(sl.islice(start, stop)) == expected[start:stop]
+        assert list(sl.islice(start, stop, reverse=True)) == expected[start:stop][::-1]
+
+    assert sl[::-3] == expected[::-3]
+    assert sl[400:10:-9] == expected[400:10:-9]
+    assert list(SortedList().irange(1, 2)) == list(SortedList().islice()) == []
+
+    big = SortedList(range(100000))
+    assert list(big.irange(500, 510)) == list(range(500, 510))
+    assert list(big.islice(99995)) == list(range(99995, 100000))
+
+
+def test_bulk_load():
+    random.seed(3)
+    for n in [0, 1, 2, 3, 7, 8, 1000]:
+        xs = [random.randrange(50) for _ in range(n)]
+        sl = SortedList(xs)
+        assert list(sl) == sorted(xs)
+        assert len(sl) == n
+        assert SortedList(sorted(xs), presorted=True)._zree == sl._zree
+        if n:
+            assert sl._zree.height() == (n).bit_length() - 1
+            assert sl._zree.root.size == n
+
+        def check(node):
+            if not node:
+                return -1, 0
+            (lh, ls), (rh, rs) = check(node.left), check(node.right)
+            assert abs(lh - rh) < 2
+            assert (node.height, node.size) == (1 + max(lh, rh), 1 + ls + rs)
+            return node.height, node.size
+
+        check(sl._zree.root)
+
+        # the bulk loaded tree keeps working as an AVL tree
+        sl.add(25).add(-1)
+        sl.remove(25)
+        assert list(sl) == sorted(xs + [-1])
+
+
+def test_update():
+    sl = SortedList(range(0, 1000, 2))
+    sl.update([5, 1, 3])
+    assert list(sl) == sorted(list(range(0, 1000, 2)) + [1, 3, 5])
+
+    sl.update(range(1, 1000, 2))
+    assert list(sl) == sorted(list(range(1000)) + [1, 3, 5])
+    assert len(sl) == 1003
+    assert sl._zree.height() == 9
+    assert SortedList().update([2, 1]) == SortedList([1, 2])
+
+    # an empty list is bulk loaded, rather than grown by repeated adds
+    empty = SortedList().update(range(1000))
+    assert empty._zree.height() == (1000).bit_length() - 1
+    assert empty._zree == SortedList(range(1000))._zree
+
+
+def test_iterative_add_remove():
+    random.seed(25)
+    sl, expected = SortedList(), []
+
+    def check(node):
+        if not node:
+            return -1, 0
+        (lh, ls), (rh, rs) = check(node.left), check(node.right)
+        assert abs(lh - rh) < 2
+        assert (node.height, node.size) == (1 + max(lh, rh), 1 + ls + rs)
+        return node.height, node.size
+
+    for _ in range(2000):
+        x = random.randint(0, 100)
+        if x in expected and random.random() < 0.4:
+            sl.remove(x)
+            expected.remove(x)
+        else:
+            sl.add(x)
+            bisect.insort(expected, x)
+        assert check(sl._zree.root)[1] == len(expected) == len(sl)
+
+    assert list(sl) == expected
+    assert all(x in sl for x in expected) and -1 not in sl
+    assert sl._zree.find(expected[0]).x == expected[0]
+    assert sl._zree.find(101) is None
+
+    with pytest.raises(ValueError):
+        sl.remove(101)
+
+    # nodes carry no __dict__
+    assert not hasattr(sl._zree.root, "__dict__")
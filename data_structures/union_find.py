@@ -1,54 +1,96 @@
-from collections import defaultdict
+import os
+from array import array
+from itertools import compress
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from operator import ne
 
 
 class UnionFind:
     """
     Disjoint Set implementation
+
+    With `auto_add=True`, `find` and `union` add elements they have not seen before as singletons
     """
 
-    def __init__(self, universe):
-        self._others = defaultdict(set)
+    def __init__(self, universe=(), auto_add=False):
+        self._auto_add = auto_add
         self._elts = set(universe)
         self._reps = self._elts.copy()
         self._comp_count = len(self._elts)
         self._parent = {x: x for x in self._elts}
+        self._size = {x: 1 for x in self._elts}
+        # each component's members are threaded onto a circular list of "next" pointers
+        self._next = {x: x for x in self._elts}
 
     ### Element Level Methods ###
 
     def union(self, x, y):
         parent_x, parent_y = self.find(x), self.find(y)
         if parent_x != parent_y:
+            if self._size[parent_x] > self._size[parent_y]:
+                parent_x, parent_y = parent_y, parent_x
             self._parent[parent_x] = parent_y
+            self._size[parent_y] += self._size.pop(parent_x)
 
             self._comp_count -= 1
             self._reps.remove(parent_x)
 
-            self._others[parent_y] = self._others[parent_y].union(self._others[parent_x])
-            self._others[parent_y].add(parent_x)
-            del self._others[parent_x]
+            # swapping the successors splices the two circular lists into one in O(1)
+            nxt = self._next
+            nxt[parent_x], nxt[parent_y] = nxt[parent_y], nxt[parent_x]
 
             return parent_y
 
     def find(self, x):
+        if self._auto_add and x not in self._parent:
+            self.add(x)
         if self._parent[x] != x:
             self._parent[x] = self.find(self._parent[x])
         return self._parent[x]
 
-    def _get_rep_and_others(self, x):
-        rep = self.find(x)
-        return rep, self._others[rep]
+    def _members(self, x):
+        """
+        Walks the circular list through x's component in O(component size)
+        """
+        nxt = self._next
+        y = x
+        while True:
+            yield y
+            y = nxt[y]
+            if y == x:
+                return
 
     def component(self, x):
-        rep, others = self._get_rep_and_others(x)
-        return others.union({rep})
+        self.find(x)
+        return set(self._members(x))
 
     def component_size(self, x):
-        rep, others = self._get_rep_and_others(x)
-        return 1 + len(others)
+        return self._size[self.find(x)]
 
     def connected(self, x, y):
         return self.find(x) == self.find(y)
 
+    ### Bulk Methods ###
+
+    def union_many(self, xs, ys):
+        """
+        Unions each pair of `zip(xs, ys)` and returns the list of their resulting representatives.
+        This is a plain loop over `union`, for parity with `CompactUnionFind`, and no faster than one.
+        """
+        union, find = self.union, self.find
+        res = []
+        for x, y in zip(xs, ys):
+            rep = union(x, y)
+            res.append(find(y) if rep is None else rep)
+        return res
+
+    def find_many(self, xs):
+        """
+        The representatives of all of `xs`, as a plain loop over `find`
+        """
+        return list(map(self.find, xs))
+
     ### Set Level Methods ###
 
     def __len__(self):
@@ -61,16 +103,18 @@ class UnionFind:
 
         return res
 
-    # def add(self, *elts):
-    #     actually_added = False
-    #     new_elts = set(elts)
-    #     for x in new_elts:
-    #         if x not in self._elts:
-    #             actually_added = True
-    #             self._elts.add(x)
-    #             self._comp_count += 1
-    #             self._parent[x] = x
-    #     return actually_added
+    def add(self, *elts):
+        actually_added = False
+        for x in elts:
+            if x not in self._elts:
+                actually_added = True
+                self._elts.add(x)
+                self._reps.add(x)
+                self._comp_count += 1
+                self._parent[x] = x
+                self._size[x] = 1
+                self._next[x] = x
+        return actually_added
 
     def __eq__(self, other):
         if type(self) != type(other):
@@ -82,11 +126,524 @@ class UnionFind:
         if self._elts != other._elts:
             return False
 
-        for elt in self._elts:
-            if self.component(elt) != other.component(elt):
+        # the partitions are equal iff pairing up the roots of each element is one-to-one
+        # (no ordering needed, so mixed-type universes compare fine)
+        forward, backward = {}, {}
+        find, other_find = self.find, other.find
+        for x in self._elts:
+            root, other_root = find(x), other_find(x)
+            if forward.setdefault(root, other_root) != other_root:
+                return False
+            if backward.setdefault(other_root, root) != root:
                 return False
-
         return True
 
     def __ne__(self, other):
         return not self == other
+
+    def __hash__(self):
+        """
+        Hashes the current partition, so don't union a UnionFind while it is used as a key
+        """
+        return hash(frozenset(frozenset(c) for c in self.sets()))
+
+    def canonical_labels(self):
+        """
+        Maps every element to the minimum element of its component in a single O(n) pass over
+        the member lists. Equal partitions have equal labels, but unlike `==` this requires
+        the elements of each component to be mutually comparable.
+        """
+        labels = {}
+        for rep in self._reps:
+            members = list(self._members(rep))
+            label = min(members)
+            for x in members:
+                labels[x] = label
+        return labels
+
+
+class CompactUnionFind:
+    """
+    Disjoint Set implementation for a dense integer universe 0..n-1
+
+    Parents and component sizes are kept in `array('i')` buffers rather than dicts
+    and per-component sets. `union` is by size and `find` is iterative with path halving,
+    so even tens of millions of elements neither hit the recursion limit nor exhaust memory.
+
+    `add` grows the buffers geometrically. Slots that were allocated but not yet added
+    are marked by a size of 0 (an element's size never drops below 1 once it is added).
+    With `auto_add=True`, `find` and `union` add non-negative ints they have not seen before.
+    """
+
+    def __init__(self, n=0, auto_add=False):
+        self._parent = array("i", range(n))
+        self._size = array("i", [1]) * n
+        self._next = array("i", range(n))
+        self._elt_count = n
+        self._comp_count = n
+        self._auto_add = auto_add
+
+    ### Element Level Methods ###
+
+    def union(self, x, y):
+        parent_x, parent_y = self.find(x), self.find(y)
+        if parent_x != parent_y:
+            size = self._size
+            if size[parent_x] > size[parent_y]:
+                parent_x, parent_y = parent_y, parent_x
+            self._parent[parent_x] = parent_y
+            size[parent_y] += size[parent_x]
+
+            self._comp_count -= 1
+
+            nxt = self._next
+            nxt[parent_x], nxt[parent_y] = nxt[parent_y], nxt[parent_x]
+
+            return parent_y
+
+    def find(self, x):
+        parent = self._parent
+        if not (0 <= x < len(parent) and self._size[x]):
+            if not (self._auto_add and 0 <= x):
+                raise KeyError(x)
+            self.add(x)
+            return x
+
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def component(self, x):
+        self.find(x)
+        nxt = self._next
+        res, y = {x}, nxt[x]
+        while y != x:
+            res.add(y)
+            y = nxt[y]
+        return res
+
+    def component_size(self, x):
+        return self._size[self.find(x)]
+
+    def connected(self, x, y):
+        return self.find(x) == self.find(y)
+
+    ### Bulk Methods ###
+
+    def union_many(self, xs, ys):
+        """
+        Unions each pair of `zip(xs, ys)` (any int iterables, e.g. arrays or buffers)
+        and returns an `array('i')` of their resulting representatives.
+        `find` and `union` are inlined to save the per-pair method calls, which only makes it
+        about 1.2x faster than calling `union` in a loop: it is still one Python iteration per pair.
+        """
+        parent, size = self._parent, self._size
+        nxt = self._next
+        res = array("i")
+        append = res.append
+        merged = 0
+        try:
+            for x, y in zip(xs, ys):
+                n = len(parent)
+                if not (0 <= x < n and size[x]):
+                    self.find(x)
+                if not (0 <= y < len(parent) and size[y]):
+                    self.find(y)
+
+                while parent[x] != x:
+                    parent[x] = parent[parent[x]]
+                    x = parent[x]
+                while parent[y] != y:
+                    parent[y] = parent[parent[y]]
+                    y = parent[y]
+
+                if x != y:
+                    if size[x] > size[y]:
+                        x, y = y, x
+                    parent[x] = y
+                    size[y] += size[x]
+                    nxt[x], nxt[y] = nxt[y], nxt[x]
+                    merged += 1
+
+                append(y)
+        finally:
+            self._comp_count -= merged
+
+        return res
+
+    def find_many(self, xs):
+        """
+        Representatives of all of `xs` as an `array('i')`, as a loop over `find`.
+        (Flattening the whole forest up front measured slower than the lookups it saves.)
+        """
+        return array("i", map(self.find, xs))
+
+    def _flatten(self):
+        """
+        Repeatedly replaces every parent by its grand-parent until each element points at its root.
+        Union by size bounds the depth by log(n), so this takes O(log log n) passes.
+        """
+        parent = self._parent
+        while True:
+            jumped = array("i", map(parent.__getitem__, parent))
+            if jumped == parent:
+                break
+            parent = jumped
+        self._parent = parent
+
+    ### Set Level Methods ###
+
+    def __len__(self):
+        return self._comp_count
+
+    def __contains__(self, x):
+        return 0 <= x < len(self._size) and self._size[x] > 0
+
+    def sets(self):
+        parent, size = self._parent, self._size
+        return [self.component(x) for x in range(len(parent)) if parent[x] == x and size[x]]
+
+    def add(self, *elts):
+        """
+        Adds each new non-negative int of `elts` as a singleton in amortized O(1),
+        doubling the buffers whenever an element falls beyond their capacity
+        """
+        actually_added = False
+        for x in elts:
+            if x < 0:
+                raise ValueError(f"{x} is negative")
+
+            capacity = len(self._parent)
+            if x >= capacity:
+                new_capacity = max(x + 1, 2 * capacity)
+                # grow in place so that callers holding on to the buffers keep seeing them
+                self._parent.extend(range(capacity, new_capacity))
+                self._size.extend(array("i", [0]) * (new_capacity - capacity))
+                self._next.extend(range(capacity, new_capacity))
+
+            if not self._size[x]:
+                actually_added = True
+                self._size[x] = 1
+                self._elt_count += 1
+                self._comp_count += 1
+        return actually_added
+
+    def __eq__(self, other):
+        if type(self) != type(other):
+            return False
+
+        if self._comp_count != other._comp_count:
+            return False
+
+        if self._elt_count != other._elt_count:
+            return False
+
+        return self.canonical_labels() == other.canonical_labels()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        """
+        Hashes the current partition, so don't union a CompactUnionFind while it is used as a key
+        """
+        return hash(self.canonical_labels().tobytes())
+
+    def canonical_labels(self):
+        """
+        `array('i')` labelling every element with the minimum element of its component
+        (-1 for ids that were never added) up to the largest element, in one ascending O(n) pass.
+        Equal partitions have equal labels.
+        """
+        self._flatten()
+        parent, size = self._parent, self._size
+        labels = array("i", [-1]) * len(parent)
+        end = 0
+        for x in range(len(parent)):
+            if size[x]:
+                # the first member met is the minimum, and it gets parked in its root's slot
+                root = parent[x]
+                label = labels[root]
+                if label < 0:
+                    label = labels[root] = x
+                labels[x] = label
+                end = x + 1
+        del labels[end:]
+        return labels
+
+
+class RollbackUnionFind:
+    """
+    Disjoint Set implementation whose unions can be undone
+
+    Union is by rank and `find` does no path compression, so every `union` changes
+    O(1) pointers which are recorded on a history stack and `find` stays O(log n).
+    `checkpoint()` returns a token, and `rollback(token)` undoes all the unions made since.
+    This is the building block of offline (divide and conquer) dynamic connectivity.
+    """
+
+    def __init__(self, universe):
+        self._elts = set(universe)
+        self._reps = self._elts.copy()
+        self._comp_count = len(self._elts)
+        self._parent = {x: x for x in self._elts}
+        self._rank = {x: 0 for x in self._elts}
+        self._size = {x: 1 for x in self._elts}
+        self._next = {x: x for x in self._elts}
+        self._history = []
+
+    ### Element Level Methods ###
+
+    def union(self, x, y):
+        parent_x, parent_y = self.find(x), self.find(y)
+        if parent_x != parent_y:
+            if self._rank[parent_x] > self._rank[parent_y]:
+                parent_x, parent_y = parent_y, parent_x
+            rank_bumped = self._rank[parent_x] == self._rank[parent_y]
+
+            self._parent[parent_x] = parent_y
+            self._size[parent_y] += self._size[parent_x]
+            if rank_bumped:
+                self._rank[parent_y] += 1
+
+            self._comp_count -= 1
+            self._reps.remove(parent_x)
+
+            nxt = self._next
+            nxt[parent_x], nxt[parent_y] = nxt[parent_y], nxt[parent_x]
+
+            self._history.append((parent_x, parent_y, rank_bumped))
+            return parent_y
+
+    def find(self, x):
+        parent = self._parent
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    def component(self, x):
+        self.find(x)
+        nxt = self._next
+        res, y = {x}, nxt[x]
+        while y != x:
+            res.add(y)
+            y = nxt[y]
+        return res
+
+    def component_size(self, x):
+        return self._size[self.find(x)]
+
+    def connected(self, x, y):
+        return self.find(x) == self.find(y)
+
+    ### Set Level Methods ###
+
+    def __len__(self):
+        return self._comp_count
+
+    def sets(self):
+        return [self.component(rep) for rep in self._reps]
+
+    def checkpoint(self):
+        return len(self._history)
+
+    def rollback(self, token):
+        """
+        Undoes every union made after `checkpoint()` returned `token`
+        """
+        if not 0 <= token <= len(self._history):
+            raise ValueError(f"invalid checkpoint {token}")
+
+        nxt = self._next
+        while len(self._history) > token:
+            parent_x, parent_y, rank_bumped = self._history.pop()
+
+            # swapping the successors back splits the circular list in two again
+            nxt[parent_x], nxt[parent_y] = nxt[parent_y], nxt[parent_x]
+
+            self._parent[parent_x] = parent_x
+            self._size[parent_y] -= self._size[parent_x]
+            if rank_bumped:
+                self._rank[parent_y] -= 1
+
+            self._comp_count += 1
+            self._reps.add(parent_x)
+
+
+class WeightedUnionFind:
+    """
+    Disjoint Set implementation for "x - y = delta" constraints
+
+    Every element keeps its potential relative to its parent, and `find` folds those
+    into potentials relative to the root while it compresses the path (iteratively).
+    So `union(x, y, delta)` and `diff(x, y)` are near-constant amortized time, and
+    a union contradicting the constraints already recorded raises a ValueError.
+    Potentials are compared up to `tolerance`, which helps with float deltas.
+    """
+
+    def __init__(self, universe, tolerance=0):
+        self._elts = set(universe)
+        self._comp_count = len(self._elts)
+        self._parent = {x: x for x in self._elts}
+        self._size = {x: 1 for x in self._elts}
+        self._potential = {x: 0 for x in self._elts}
+        self.tolerance = tolerance
+
+    ### Element Level Methods ###
+
+    def union(self, x, y, delta):
+        """
+        Records that x - y == delta and returns the resulting representative
+        """
+        parent_x, parent_y = self.find(x), self.find(y)
+        # potentials relative to the (fresh) roots
+        pot_x, pot_y = self._potential[x], self._potential[y]
+
+        if parent_x == parent_y:
+            if abs(pot_x - pot_y - delta) > self.tolerance:
+                raise ValueError(f"{x} - {y} == {pot_x - pot_y} contradicts {x} - {y} == {delta}")
+            return parent_x
+
+        # parent_x - parent_y == (x - pot_x) - (y - pot_y)
+        offset = delta - pot_x + pot_y
+        if self._size[parent_x] > self._size[parent_y]:
+            parent_x, parent_y, offset = parent_y, parent_x, -offset
+        self._parent[parent_x] = parent_y
+        self._potential[parent_x] = offset
+        self._size[parent_y] += self._size.pop(parent_x)
+
+        self._comp_count -= 1
+
+        return parent_y
+
+    def find(self, x):
+        parent, potential = self._parent, self._potential
+        path = []
+        while parent[x] != x:
+            path.append(x)
+            x = parent[x]
+
+        root = x
+        # from the top down, each parent's potential is already relative to the root
+        for y in reversed(path):
+            if parent[y] != root:
+                potential[y] += potential[parent[y]]
+                parent[y] = root
+        return root
+
+    def diff(self, x, y):
+        """
+        x - y, or a ValueError if no chain of constraints relates x and y
+        """
+        if self.find(x) != self.find(y):
+            raise ValueError(f"{x} and {y} are not related")
+        return self._potential[x] - self._potential[y]
+
+    def component_size(self, x):
+        return self._size[self.find(x)]
+
+    def connected(self, x, y):
+        return self.find(x) == self.find(y)
+
+    ### Set Level Methods ###
+
+    def __len__(self):
+        return self._comp_count
+
+
+def _state(ds):
+    ds._flatten()
+    return ds._parent, ds._size, ds._next, ds._comp_count
+
+
+def _restore(state):
+    ds = CompactUnionFind()
+    ds._parent, ds._size, ds._next, ds._comp_count = state
+    ds._elt_count = len(ds._parent)
+    return ds
+
+
+_shared = None
+
+
+def _attach(xs_name, ys_name, m):
+    """
+    Pool initializer: maps the parent's shared edge buffers into the worker without copying them
+    """
+    global _shared
+    xs_shm, ys_shm = SharedMemory(name=xs_name), SharedMemory(name=ys_name)
+    _shared = (xs_shm, ys_shm, xs_shm.buf[:4 * m].cast("i"), ys_shm.buf[:4 * m].cast("i"))
+
+
+def _union_range(task):
+    """
+    Pool worker: unions the shared edges lo..hi-1 over the whole universe (so without relabelling),
+    and returns the flattened buffers of the resulting CompactUnionFind
+    """
+    n, lo, hi = task
+    _, _, xs, ys = _shared
+    ds = CompactUnionFind(n)
+    ds.union_many(xs[lo:hi], ys[lo:hi])
+    return _state(ds)
+
+
+def _merge_states(pair):
+    """
+    Pool worker: one step of the tree reduction. Every element of the second partition
+    that isn't a root is unioned with its root (its parent, once flattened) into the first one.
+    """
+    state, (parent, _, _, _) = pair
+    ds = _restore(state)
+    elts = range(len(parent))
+    ds.union_many(compress(elts, map(ne, parent, elts)), compress(parent, map(ne, parent, elts)))
+    return _state(ds)
+
+
+def _to_shared_memory(buf):
+    shm = SharedMemory(create=True, size=max(1, 4 * len(buf)))
+    shm.buf[:4 * len(buf)] = memoryview(buf).cast("B")
+    return shm
+
+
+def parallel_union_find(n, xs, ys, processes=None):
+    """
+    Builds the CompactUnionFind of the universe 0..n-1 joined by the pairs of `zip(xs, ys)`
+    (int buffers, e.g. arrays) over a `multiprocessing` pool, as `union_many` would.
+
+    The edges are put in shared memory once, and each worker unions its own contiguous range of them
+    over the whole universe. The partitions are then merged pairwise on the workers (a tree reduction),
+    each merge costing one union per element that isn't a root of its partition,
+    and the calling process just takes over the buffers of the last one.
+    So the work is O(m / processes) per worker plus O(min(n, m / processes) * log(processes))
+    for the reduction: only inputs with many more edges than vertices scale with cores
+    (8M random edges over 100k vertices: 2.8x on 4 workers, 4.3x on 8), while on sparse inputs
+    (1M edges over 1M vertices) the merges make it slower than a sequential `union_many`.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    xs, ys = array("i", xs), array("i", ys)
+    if len(xs) != len(ys):
+        raise ValueError(f"{len(xs)} sources but {len(ys)} targets")
+
+    if processes == 1 or len(xs) < processes:
+        res = CompactUnionFind(n)
+        res.union_many(xs, ys)
+        return res
+
+    m = len(xs)
+    xs_shm, ys_shm = _to_shared_memory(xs), _to_shared_memory(ys)
+    try:
+        bounds = [m * i // processes for i in range(processes + 1)]
+        tasks = [(n, lo, hi) for lo, hi in zip(bounds, bounds[1:])]
+        with Pool(processes, initializer=_attach, initargs=(xs_shm.name, ys_shm.name, m)) as pool:
+            states = pool.map(_union_range, tasks)
+            while len(states) > 1:
+                odd = states[-1:] if len(states) % 2 else []
+                states = pool.map(_merge_states, zip(states[::2], states[1::2])) + odd
+    finally:
+        for shm in (xs_shm, ys_shm):
+            shm.close()
+            shm.unlink()
+
+    return _restore(states[0])
@@ -1,21 +1,24 @@
-from typing import Iterable
+from collections.abc import ItemsView, KeysView, Mapping, MutableMapping, ValuesView
+from itertools import chain, islice
+from operator import attrgetter, itemgetter
+from typing import Any, Iterable, Iterator, List, Tuple
 
 
 class Node:
-    def __init__(self, x, left=None, right=None):  # , parent=None):
+    __slots__ = ("x", "value", "left", "right", "height", "size")
+
+    def __init__(self, x, left=None, right=None, value=None):  # , parent=None):
         self.x = x
+        # only used by SortedDict, where x is the key
+        self.value = value
         self.left, self.right = left, right
         # self.left, self.right, self.parent = left, right, parent
         self._reset_height()
 
     def imbalance(self):
-        if not (self.left or self.right):
-            return 0
-        if not self.left:
-            return -self.height
-        if not self.right:
-            return self.height
-        return self.left.height - self.right.height
+        # a missing child counts as height -1, a leaf being of height 0
+        left, right = self.left, self.right
+        return (left.height if left else -1) - (right.height if right else -1)
 
     def __eq__(self, other):
         if type(other) != type(self):
@@ -38,12 +41,25 @@ class Node:
                 yield n
 
     def _reset_height(self):
-        children = self.children()
-        if not children:
+        """
+        Also resets the size of the subtree, which order statistics rely on.
+        This runs on every level of every update, so it is inlined arithmetic without allocations.
+        """
+        left, right = self.left, self.right
+        if left:
+            if right:
+                lh, rh = left.height, right.height
+                self.height = 1 + (lh if lh > rh else rh)
+                self.size = 1 + left.size + right.size
+            else:
+                self.height = 1 + left.height
+                self.size = 1 + left.size
+        elif right:
+            self.height = 1 + right.height
+            self.size = 1 + right.size
+        else:
             self.height = 0
-            return
-
-        self.height = 1 + max(map(lambda n: n.height, children))
+            self.size = 1
 
     def is_leaf(self) -> bool:
         return not (self.left or self.right)
@@ -62,13 +78,12 @@ class Node:
             None - if x not on my subtree
             node - if node holds x
         """
-        if x == self.x:
-            return self
-
-        if x < self.x:
-            return self.left.find(x) if self.left else None
-
-        return self.right.find(x) if self.right else None
+        node = self
+        while node:
+            if x == node.x:
+                return node
+            node = node.left if x < node.x else node.right
+        return None
 
     def find_path(self, x) -> list:
         """
@@ -77,22 +92,18 @@ class Node:
 
         path is a list of type (Node, "left" or "right" or None)
         """
-        if x == self.x:
-            return [(self, None)]
-
-        curr_res = rec_res = None
-        if x < self.x:
-            if not self.left:
-                return None
-            curr_res = [(self, "left")]
-            rec_res = self.left.find_path(x)
-        else:
-            if not self.right:
-                return None
-            curr_res = [(self, "right")]
-            rec_res = self.right.find_path(x)
-
-        return curr_res + rec_res if rec_res else None
+        path, node = [], self
+        while node:
+            if x == node.x:
+                path.append((node, None))
+                return path
+            if x < node.x:
+                path.append((node, "left"))
+                node = node.left
+            else:
+                path.append((node, "right"))
+                node = node.right
+        return None
 
 
 class Zree:
@@ -105,6 +116,9 @@ class Zree:
         self.root = None
         self.size = 0
         self.verbose = verbose
+        # search path of the current add or remove, and whether it went left at each node,
+        # reused from one operation to the next
+        self._path, self._went_left = [], []
 
     def __len__(self):
         return self.size
@@ -145,32 +159,56 @@ class Zree:
             return 0
         return self.root.height
 
-    def add(self, x):
-        self.size += 1
-        self.root = self._add(x, self.root)
+    def build(self, xs: list, values: list = None):
+        """
+        Replaces the contents of the tree by the sorted list `xs` (holding `values`, if any),
+        as a perfectly balanced tree built bottom up (children before their parent) in O(N)
+        """
+
+        def build_range(lo, hi):
+            if lo == hi:
+                return None
+            mid = (lo + hi) // 2
+            value = values[mid] if values is not None else None
+            return Node(xs[mid], build_range(lo, mid), build_range(mid + 1, hi), value)
 
-    def _add(self, x, node: Node) -> Node:
+        self.root = build_range(0, len(xs))
+        self.size = len(xs)
+
+    def add(self, x, value=None):
         """
-        add a new node in order, __below__ the given node
+        Iterative insertion: descend recording the path, then rebalance back up it
+        (the same rotations a recursive insert would make on its way back)
         """
-        if not node:
-            return Node(x)
+        path, went_left = self._path, self._went_left
+        path.clear()
+        went_left.clear()
 
-        if x < node.x:
-            node.left = self._add(x, node.left)
-            # node.left.parent = node
-        else:
-            node.right = self._add(x, node.right)
-            # node.right.parent = node
+        node = self.root
+        while node:
+            path.append(node)
+            left = x < node.x
+            went_left.append(left)
+            node = node.left if left else node.right
 
-        node._reset_height()
-        return self._rebalance(node)
+        node = Node(x, value=value)
+        while path:
+            parent = path.pop()
+            if went_left.pop():
+                parent.left = node
+            else:
+                parent.right = node
+            parent._reset_height()
+            node = self._rebalance(parent)
+
+        self.root = node
+        self.size += 1
 
     def _rebalance(self, node: Node) -> Node:
         if abs(node.imbalance()) < 2:
             return node
 
-        at_root = node == self.root
+        at_root = node is self.root
         # parent = node.parent
 
         if node.imbalance() < 0:
@@ -214,12 +252,12 @@ class Zree:
             ancestors.append(nxt)
             nxt = nextor(nxt)
 
-        node.x = nxt.x
+        node.x, node.value = nxt.x, nxt.value
         if not ancestors:
             if successor:
-                node.right = None
+                node.right = nxt.right
             else:
-                node.left = None
+                node.left = nxt.left
         else:
             last_anc = ancestors[-1]
             if successor:
@@ -285,32 +323,31 @@ class Zree:
     def remove(self, x) -> None:
         # self.root = self._remove(x, self.root)
 
-        if not self.root:
-            raise ValueError(f"{x} not found")
-
-        path = self.root.find_path(x)
-        if not path:
-            raise ValueError(f"{x} not found")
+        path, went_left = self._path, self._went_left
+        path.clear()
+        went_left.clear()
 
-        node, direction = path.pop()
-        assert node.x == x and direction is None
+        node = self.root
+        while node and not x == node.x:
+            path.append(node)
+            left = x < node.x
+            went_left.append(left)
+            node = node.left if left else node.right
 
-        if not path:
-            assert node == self.root
+        if not node:
+            raise ValueError(f"{x} not found")
 
-        children = node.children()
-        if len(children) == 2:
+        if node.left and node.right:
             if node.imbalance() > 0:
-                node = self.pluck_predecessor_as_root(node)
+                _, node = self.pluck_predecessor_as_root(node)
             else:
-                node = self.pluck_successor_as_root(node)
+                _, node = self.pluck_successor_as_root(node)
         else:
             node = node.left if node.left else node.right
 
         while path:
-            parent, direction = path.pop()
-            assert direction is not None
-            if direction == "left":
+            parent = path.pop()
+            if went_left.pop():
                 parent.left = node
             else:
                 parent.right = node
@@ -321,15 +358,146 @@ class Zree:
         self.size -= 1
 
     def __iter__(self):
-        if self.root:
-            for node in self.root:
-                yield node.x
+        return map(attrgetter("x"), self.walk(self._spine(self.root, [])))
+
+    @staticmethod
+    def _spine(node: Node, stack: list, reverse: bool = False) -> list:
+        while node:
+            stack.append(node)
+            node = node.right if reverse else node.left
+        return stack
+
+    def walk(self, stack: list, reverse: bool = False) -> Iterator[Node]:
+        """
+        In-order traversal (reversed when `reverse`) with an explicit stack rather than nested generators,
+        so it costs O(1) amortized per node. The top of `stack` is the first node to yield,
+        and below it are the ancestors still to be visited, as left by the seek methods below.
+        """
+        while stack:
+            node = stack.pop()
+            yield node
+            self._spine(node.left if reverse else node.right, stack, reverse)
+
+    def seek_value(self, x, inclusive: bool = True, reverse: bool = False) -> list:
+        """
+        Walk stack starting at the first element >= x (> x if not `inclusive`),
+        or when `reverse` at the last element <= x (< x if not `inclusive`), in O(log N).
+        A None x starts at the very first (or last) element.
+        """
+        if x is None:
+            return self._spine(self.root, [], reverse)
+
+        stack, node = [], self.root
+        while node:
+            if reverse:
+                after = node.x < x or (inclusive and not x < node.x)
+            else:
+                after = x < node.x or (inclusive and not node.x < x)
+            if after:
+                stack.append(node)
+                node = node.right if reverse else node.left
+            else:
+                node = node.left if reverse else node.right
+        return stack
+
+    def seek_index(self, i: int, reverse: bool = False) -> list:
+        """
+        Walk stack starting at the i'th smallest element, going up (or down when `reverse`) from there, in O(log N)
+        """
+        stack, node = [], self.root
+        if not 0 <= i < self.size:
+            return stack
+
+        while True:
+            left_size = node.left.size if node.left else 0
+            if i == left_size:
+                stack.append(node)
+                return stack
+            go_left = i < left_size
+            if go_left != reverse:
+                stack.append(node)
+            if go_left:
+                node = node.left
+            else:
+                i -= left_size + 1
+                node = node.right
 
     def __contains__(self, x) -> bool:
-        if not self.root:
-            return False
+        return self.find(x) is not None
 
-        return self.root.find_path(x) is not None
+    def find(self, x) -> Node:
+        """
+        A node holding x, or None
+        """
+        node = self.root
+        while node:
+            if x == node.x:
+                return node
+            node = node.left if x < node.x else node.right
+        return None
+
+    def select(self, i: int) -> Node:
+        """
+        The node holding the i'th smallest element (0-based), in O(log N) thanks to the subtree sizes
+        """
+        if not 0 <= i < self.size:
+            raise IndexError(f"index {i} out of range")
+
+        node = self.root
+        while True:
+            left_size = node.left.size if node.left else 0
+            if i < left_size:
+                node = node.left
+            elif i == left_size:
+                return node
+            else:
+                i -= left_size + 1
+                node = node.right
+
+    def rank(self, x, right: bool = False) -> int:
+        """
+        Number of elements < x (or <= x when `right`) in O(log N)
+        """
+        node, res = self.root, 0
+        while node:
+            if node.x < x or (right and not x < node.x):
+                res += 1 + (node.left.size if node.left else 0)
+                node = node.right
+            else:
+                node = node.left
+        return res
+
+    def range_nodes(
+        self, lo=None, hi=None, inclusive: Tuple[bool, bool] = (True, True), reverse: bool = False
+    ) -> Iterator[Node]:
+        """
+        Nodes holding elements between lo and hi (None bounds being open): seek one boundary then walk until the other
+        """
+        if reverse:
+            stack = self.seek_value(hi, inclusive[1], reverse=True)
+        else:
+            stack = self.seek_value(lo, inclusive[0])
+
+        for node in self.walk(stack, reverse):
+            x = node.x
+            if reverse:
+                if lo is not None and (x < lo or (not inclusive[0] and not lo < x)):
+                    return
+            elif hi is not None and (hi < x or (not inclusive[1] and not x < hi)):
+                return
+            yield node
+
+    def slice_nodes(self, start: int = None, stop: int = None, reverse: bool = False) -> Iterator[Node]:
+        """
+        Nodes of positions start..stop-1 (with `slice` semantics), backwards if `reverse`
+        """
+        start, stop, _ = slice(start, stop).indices(self.size)
+        count = stop - start
+        if count <= 0:
+            return iter(())
+
+        stack = self.seek_index(stop - 1 if reverse else start, reverse)
+        return islice(self.walk(stack, reverse), count)
 
     def minimum(self):
         if self.verbose:
@@ -364,7 +532,7 @@ class SortedList:
     Inspired by: https://stackoverflow.com/questions/37669222/how-can-i-hint-that-a-type-is-comparable-with-typing
 
     Example:
-    >>> sl = SortedList(range(1000))            # construct using an iterable of a comparable in O(N * log N)
+    >>> sl = SortedList(range(1000))            # construct from an iterable of comparables in O(N * log N), O(N) if presorted
     >>> sl.add(-4).add(-5).add(42).add(1337)    # add some more comparables each time in O(log N)
     >>> assert len(sl) == 1004                  # you can get its length in O(1)
     >>> assert 42 in sl                         # you can check for containment in O(log N)
@@ -374,17 +542,41 @@ class SortedList:
     >>> assert sl.minimum() == -5               # you can get the min in O(log N) (but the built-in will be slower)
     >>> assert sl.maximum() == 1337             # you can get the max in O(log N) (but the built-in will be slower)
     >>> sl.remove(1337)                         # you can remove an element in O(log N)
+    >>> assert sl[0] == -5 and sl[-1] == 999    # you can index it in O(log N)
+    >>> assert sl[1:3] == [-4, 0]               # you can slice it in O(log N + K)
+    >>> assert sl.index(42) == 44               # you can find the position of an element in O(log N)
+    >>> assert sl.count(42) == 2                # you can count an element in O(log N)
+    >>> assert sl.bisect_left(42) == 44         # you can bisect it in O(log N)
+    >>> assert sl.bisect_right(42) == 46
+    >>> assert list(sl.irange(40, 43)) == [40, 41, 42, 42]          # you can iterate over a range of values
+    >>> assert list(sl.islice(0, 3, reverse=True)) == [0, -4, -5]   # or of positions in O(log N + K)
     """
 
-    def __init__(self, it: Iterable = [], verbose: bool = False):
+    def __init__(self, it: Iterable = [], verbose: bool = False, presorted: bool = False):
+        """
+        `it` is sorted once (unless declared `presorted`) and bulk loaded in O(N)
+        """
         self._zree = Zree(verbose=verbose)
-        for x in it:
-            self.add(x)
+        self._zree.build(list(it) if presorted else sorted(it))
 
     def add(self, x):
         self._zree.add(x)
         return self
 
+    def update(self, it: Iterable):
+        """
+        Adds all of `it`: one by one when there are few of them, and otherwise by merging them
+        with the current elements (a merge of two sorted runs is O(N) for `sorted`) and bulk loading
+        """
+        xs = sorted(it)
+        # (an empty or small list always bulk loads, as bit_length() would make the test vacuous)
+        if len(xs) * max(1, len(self).bit_length()) <= len(self):
+            for x in xs:
+                self._zree.add(x)
+        else:
+            self._zree.build(sorted(chain(self, xs)))
+        return self
+
     def remove(self, x):
         """
         Raises a ValueError if `x not in self`
@@ -394,6 +586,35 @@ class SortedList:
     def tree_print(self):
         print(self._zree.tree_str())
 
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step > 0:
+                return list(self.islice(start, stop))[::step]
+            return list(self.islice(stop + 1, start + 1, reverse=True))[::-step]
+
+        if i < 0:
+            i += len(self)
+        return self._zree.select(i).x
+
+    def bisect_left(self, x) -> int:
+        return self._zree.rank(x)
+
+    def bisect_right(self, x) -> int:
+        return self._zree.rank(x, right=True)
+
+    def count(self, x) -> int:
+        return self.bisect_right(x) - self.bisect_left(x)
+
+    def index(self, x) -> int:
+        """
+        Position of the first occurrence of x. Raises a ValueError if `x not in self`
+        """
+        i = self.bisect_left(x)
+        if i == len(self) or self[i] != x:
+            raise ValueError(f"{x} is not in SortedList")
+        return i
+
     def __eq__(self, other):
         if type(other) != type(self):
             return False
@@ -410,8 +631,22 @@ class SortedList:
         return True
 
     def __iter__(self):
-        for x in self._zree:
-            yield x
+        return iter(self._zree)
+
+    def irange(
+        self, lo=None, hi=None, inclusive: Tuple[bool, bool] = (True, False), reverse: bool = False
+    ) -> Iterator:
+        """
+        Lazily iterates over the elements between lo and hi ([lo, hi) by default, a None bound being open),
+        in O(log N + K) for K elements
+        """
+        return map(attrgetter("x"), self._zree.range_nodes(lo, hi, inclusive, reverse))
+
+    def islice(self, start: int = None, stop: int = None, reverse: bool = False) -> Iterator:
+        """
+        Lazily iterates over `self[start:stop]` (backwards if `reverse`) in O(log N + K) for K elements
+        """
+        return map(attrgetter("x"), self._zree.slice_nodes(start, stop, reverse))
 
     def __contains__(self, x) -> bool:
         return x in self._zree
@@ -424,3 +659,205 @@ class SortedList:
 
     def maximum(self):
         return self._zree.maximum()
+
+
+class SortedKeysView(KeysView):
+    def __reversed__(self):
+        return reversed(self._mapping)
+
+
+class SortedValuesView(ValuesView):
+    def __iter__(self):
+        return map(attrgetter("value"), self._mapping._zree.slice_nodes())
+
+    def __reversed__(self):
+        return map(attrgetter("value"), self._mapping._zree.slice_nodes(reverse=True))
+
+
+class SortedItemsView(ItemsView):
+    def __iter__(self):
+        return ((node.x, node.value) for node in self._mapping._zree.slice_nodes())
+
+    def __reversed__(self):
+        return ((node.x, node.value) for node in self._mapping._zree.slice_nodes(reverse=True))
+
+
+class SortedDict(MutableMapping):
+    """
+    My own AVL-tree based Sorted Dict, sharing the Zree engine with SortedList:
+    each node holds a key and its value, and comparisons only ever look at the key.
+
+    Example:
+    >>> sd = SortedDict({30: "z", 10: "x"})        # construct like a dict in O(N * log N)
+    >>> sd[20] = "y"                                # get, set or delete in O(log N)
+    >>> assert list(sd) == [10, 20, 30]             # keys, values and items views are ordered
+    >>> assert sd.floor(25) == 20 and sd.ceiling(25) == 30
+    >>> assert sd.predecessor(20) == 10 and sd.successor(20) == 30
+    >>> assert sd.peekitem(0) == (10, "x")          # order statistics in O(log N)
+    >>> assert sd.pop_first(2) == [(10, "x"), (20, "y")]   # evict the N smallest keys in O(N * log N)
+    >>> sd.delete_range(30, 40)                     # delete a range of keys in O((K + 1) * log N)
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Takes the same arguments as `dict`, but keys only need to be comparable, not hashable
+        """
+        if len(args) > 1:
+            raise TypeError(f"SortedDict expected at most 1 argument, got {len(args)}")
+
+        items = []
+        if args:
+            it = args[0]
+            items.extend(((k, it[k]) for k in it.keys()) if hasattr(it, "keys") else it)
+        items.extend(kwargs.items())
+
+        # a stable sort keeps repeated keys in order, of which the last value wins like in a dict
+        items.sort(key=itemgetter(0))
+        keys, values = [], []
+        for k, v in items:
+            if keys and keys[-1] == k:
+                values[-1] = v
+            else:
+                keys.append(k)
+                values.append(v)
+
+        self._zree = Zree()
+        self._zree.build(keys, values)
+
+    def __getitem__(self, key):
+        node = self._zree.find(key)
+        if node is None:
+            raise KeyError(key)
+        return node.value
+
+    def __setitem__(self, key, value):
+        node = self._zree.find(key)
+        if node is None:
+            self._zree.add(key, value)
+        else:
+            node.value = value
+
+    def __delitem__(self, key):
+        try:
+            self._zree.remove(key)
+        except ValueError:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._zree)
+
+    def __reversed__(self):
+        return map(attrgetter("x"), self._zree.slice_nodes(reverse=True))
+
+    def __len__(self):
+        return len(self._zree)
+
+    def __contains__(self, key) -> bool:
+        return self._zree.find(key) is not None
+
+    def __repr__(self):
+        # not through a dict, whose keys would have to be hashable
+        return "SortedDict({" + ", ".join(f"{k!r}: {v!r}" for k, v in self.items()) + "})"
+
+    def __eq__(self, other):
+        """
+        Compares the ordered items of two SortedDicts pairwise, so keys need not be hashable
+        """
+        if not isinstance(other, SortedDict):
+            return Mapping.__eq__(self, other)
+        return len(self) == len(other) and all(
+            k1 == k2 and v1 == v2 for (k1, v1), (k2, v2) in zip(self.items(), other.items())
+        )
+
+    def keys(self) -> SortedKeysView:
+        return SortedKeysView(self)
+
+    def values(self) -> SortedValuesView:
+        return SortedValuesView(self)
+
+    def items(self) -> SortedItemsView:
+        return SortedItemsView(self)
+
+    def irange(
+        self, lo=None, hi=None, inclusive: Tuple[bool, bool] = (True, False), reverse: bool = False
+    ) -> Iterator:
+        """
+        Lazily iterates over the keys between lo and hi ([lo, hi) by default, a None bound being open)
+        """
+        return map(attrgetter("x"), self._zree.range_nodes(lo, hi, inclusive, reverse))
+
+    def islice(self, start: int = None, stop: int = None, reverse: bool = False) -> Iterator:
+        return map(attrgetter("x"), self._zree.slice_nodes(start, stop, reverse))
+
+    def _first_key(self, key, inclusive: bool, reverse: bool):
+        stack = self._zree.seek_value(key, inclusive, reverse)
+        return stack[-1].x if stack else None
+
+    def floor(self, key):
+        """
+        The largest key <= `key`, or None
+        """
+        return self._first_key(key, inclusive=True, reverse=True)
+
+    def ceiling(self, key):
+        """
+        The smallest key >= `key`, or None
+        """
+        return self._first_key(key, inclusive=True, reverse=False)
+
+    def predecessor(self, key):
+        """
+        The largest key < `key`, or None
+        """
+        return self._first_key(key, inclusive=False, reverse=True)
+
+    def successor(self, key):
+        """
+        The smallest key > `key`, or None
+        """
+        return self._first_key(key, inclusive=False, reverse=False)
+
+    def index(self, key) -> int:
+        """
+        Position of `key` among the keys. Raises a KeyError if `key not in self`
+        """
+        if key not in self:
+            raise KeyError(key)
+        return self._zree.rank(key)
+
+    def peekitem(self, index: int = -1) -> Tuple[Any, Any]:
+        if index < 0:
+            index += len(self)
+        node = self._zree.select(index)
+        return node.x, node.value
+
+    def popitem(self, index: int = -1) -> Tuple[Any, Any]:
+        """
+        Removes and returns the item at `index` (the largest key by default)
+        """
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        key, value = self.peekitem(index)
+        self._zree.remove(key)
+        return key, value
+
+    def pop_first(self, n: int = 1) -> List[Tuple[Any, Any]]:
+        """
+        Removes and returns the (up to) n items with the smallest keys
+        """
+        if n < 0:
+            raise ValueError(f"can't pop {n} items")
+        items = [(node.x, node.value) for node in self._zree.slice_nodes(0, n)]
+        for key, _ in items:
+            self._zree.remove(key)
+        return items
+
+    def delete_range(self, lo=None, hi=None, inclusive: Tuple[bool, bool] = (True, False)) -> int:
+        """
+        Deletes the keys between lo and hi ([lo, hi) by default, a None bound being open),
+        returning how many there were
+        """
+        keys = list(self.irange(lo, hi, inclusive))
+        for key in keys:
+            self._zree.remove(key)
+        return len(keys)